@@ -6,44 +6,72 @@ from flask_migrate import Migrate
 import os
 import timeago
 from datetime import datetime
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 csrf = CSRFProtect()
 migrate = Migrate()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     
-    # Configuration settings
-    app.config['SECRET_KEY'] = 'hjshjhdjah kjshkjdhjs'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+    # Configuration settings, chosen by the APP_CONFIG environment variable
+    from .config import load_config, engine_options
+    load_config(app)
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static/profile_pics')
     app.config['UPLOAD_FOLDER2'] = os.path.join(app.root_path, 'static/uploads')
-    app.config['WTF_CSRF_CHECK_DEFAULT'] = False
-    app.config['WTF_CSRF_ENABLED'] = True
+    if test_config:
+        app.config.update(test_config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     # Register Jinja2 filter
     app.jinja_env.filters['timeago'] = lambda date: timeago.format(date, datetime.utcnow())
     
     # Initialize extensions
     db.init_app(app)
+    from . import database
+    database.init_app(app)
     csrf.init_app(app)
     migrate.init_app(app, db)
     
+    from . import instrumentation, images, storage, fragments, conditional, recommend, messaging, events, passwords, identity, ratelimit
+    instrumentation.init_app(app)
+    images.init_app(app)
+    storage.init_app(app)
+    fragments.init_app(app)
+    conditional.init_app(app)
+    recommend.init_app(app)
+    messaging.init_app(app)
+    events.init_app(app)
+    passwords.init_app(app)
+    identity.init_app(app)
+    ratelimit.init_app(app)
+    
     # Register blueprints
     from app.routes.auth import auth
     from app.routes.home import home
     from app.routes.profile import profile
     from app.routes.job import job
     from app.routes.worker import worker
+    from app.routes.media import media
+    from app.routes.messages import messages
+    from app.routes.events import events as events_blueprint
     
     app.register_blueprint(auth, url_prefix='/auth')
     app.register_blueprint(home, url_prefix='/')
     app.register_blueprint(profile, url_prefix='/profile')
     app.register_blueprint(job, url_prefix='/job')
     app.register_blueprint(worker, url_prefix='/worker')
+    app.register_blueprint(media, url_prefix='/media')
+    app.register_blueprint(messages, url_prefix='/messages')
+    app.register_blueprint(events_blueprint, url_prefix='/events')
+    
+    # Register CLI commands
+    from .commands import register_commands
+    register_commands(app)
     
     # Import models
     from .models import User, Skill, Experience, Certification, Job, Review
+    from . import search, ratings
     
     # Create database tables if they don't exist
     with app.app_context():
@@ -56,7 +84,7 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        return identity.load_user(int(id))
     
     return app
 
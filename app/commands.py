@@ -0,0 +1,66 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from . import db
+import os
+from .models import User, Job, JobPicture
+from .ratings import recompute_ratings
+from .datagen import generate
+from . import storage
+
+@click.command('backfill-ratings')
+@with_appcontext
+def backfill_ratings():
+    """Recompute the rating summary of every user from their reviews."""
+    recompute_ratings()
+    click.echo(f'Recomputed ratings for {User.query.count()} users.')
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True, help='Number of users to add.')
+@click.option('--jobs', default=1000, show_default=True, help='Number of jobs to add.')
+@click.option('--applications', 'applications_per_job', default=3, show_default=True,
+              help='Average applications per job.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows generated and inserted per batch.')
+@click.option('--processes', default=1, show_default=True, help='Generate batches in this many processes.')
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='Random seed.')
+@with_appcontext
+def seed(users, jobs, applications_per_job, chunk_size, processes, random_seed):
+    """Fill the database with synthetic users, jobs, applications and reviews."""
+    generate(users, jobs, applications_per_job, chunk_size, processes, random_seed, progress=click.echo)
+    click.echo(f'Total users in database: {User.query.count()}, jobs: {Job.query.count()}')
+
+@click.command('import-media')
+@with_appcontext
+def import_media():
+    """Move legacy job and profile pictures into content-addressed storage.
+
+    The legacy files are left in place; duplicates end up stored once.
+    """
+    folders = [(JobPicture, 'filename', current_app.config['UPLOAD_FOLDER2']),
+               (User, 'profile_picture', current_app.config['UPLOAD_FOLDER'])]
+    imported = 0
+    for model, attribute, folder in folders:
+        column = getattr(model, attribute)
+        for row in model.query.filter(column.isnot(None)):
+            name = getattr(row, attribute)
+            path = os.path.join(folder, name)
+            if storage.is_stored(name) or not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                setattr(row, attribute, storage.store(f.read(), os.path.splitext(name)[1]))
+            imported += 1
+        db.session.commit()
+    click.echo(f'Imported {imported} pictures.')
+
+@click.command('prune-media')
+@with_appcontext
+def prune_media():
+    """Delete stored pictures that are no longer referenced."""
+    click.echo(f'Deleted {storage.prune()} unreferenced files.')
+
+def register_commands(app):
+    """Attach the CLI commands to the app."""
+    app.cli.add_command(backfill_ratings)
+    app.cli.add_command(seed)
+    app.cli.add_command(import_media)
+    app.cli.add_command(prune_media)
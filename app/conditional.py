@@ -0,0 +1,73 @@
+import hashlib
+import os
+import time
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import inspect
+from sqlalchemy.exc import NoInspectionAvailable
+from werkzeug.http import is_resource_modified
+from .messaging import unread_messages
+
+def collect(value, parts, seen):
+    """Append the loaded column values of ORM objects in value to parts,
+    following relationships that are already loaded. Never triggers a lazy load."""
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            collect(item, parts, seen)
+        return
+    try:
+        state = inspect(value)
+    except NoInspectionAvailable:
+        parts.append(repr(value))
+        return
+    parts.append(f'{type(value).__name__}{state.identity}')
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    for attribute in state.mapper.column_attrs:
+        if attribute.key in state.dict:
+            parts.append(repr(state.dict[attribute.key]))
+    for relationship in state.mapper.relationships:
+        if relationship.key in state.dict:
+            collect(state.dict[relationship.key], parts, seen)
+
+def csrf_window():
+    """Changes every half CSRF time limit, so a page revalidated with a 304
+    never carries a CSRF token that is about to expire."""
+    limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if not current_app.config.get('WTF_CSRF_ENABLED', True) or not limit:
+        return 0
+    return int(time.time() // (limit / 2))
+
+def page_etag(*values):
+    """Weak ETag of a page built from values, for the current viewer and URL.
+
+    The navbar's unread message count is part of every page, so it is included.
+    """
+    parts = [current_app.config['ETAG_SALT'], request.full_path, current_user.get_id(), csrf_window(),
+             unread_messages()]
+    collect(values, parts, set())
+    return hashlib.sha1('\x1f'.join(map(str, parts)).encode()).hexdigest()
+
+def not_modified(etag):
+    """A 304 response if the client already holds this version of the page, else None."""
+    if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+        # Flashed messages have to be rendered, and consumed, by a full response
+        return None
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    return with_etag(make_response('', 304), etag)
+
+def with_etag(response, etag):
+    """Attach the ETag; pages are per user and must be revalidated before reuse."""
+    response = make_response(response)
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def init_app(app):
+    # Part of every ETag, so pages cached by browsers go stale when the templates change
+    templates = [os.path.join(root, name)
+                 for root, _, names in os.walk(os.path.join(app.root_path, 'templates')) for name in names]
+    app.config.setdefault('ETAG_SALT', str(max((os.path.getmtime(path) for path in templates), default=0)))
@@ -0,0 +1,87 @@
+import os
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def database_url(name, default=None):
+    """A database URL from the environment, accepting the postgres:// scheme some hosts still hand out."""
+    url = os.environ.get(name, default)
+    if url and url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'hjshjhdjah kjshkjdhjs')
+    SQLALCHEMY_DATABASE_URI = database_url('DATABASE_URL', 'sqlite:///database.db')
+    # Optional read replica for read-only views, see app/routing.py. A client
+    # reads from the primary for REPLICA_PIN_SECONDS after each of its writes.
+    SQLALCHEMY_BINDS = {'replica': database_url('REPLICA_DATABASE_URL')} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    REPLICA_PIN_SECONDS = env_int('REPLICA_PIN_SECONDS', 5)
+    # Connection pool, ignored for SQLite: each app process keeps up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections to the shared server
+    DB_POOL_SIZE = env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = env_int('DB_MAX_OVERFLOW', 10)
+    DB_POOL_RECYCLE = env_int('DB_POOL_RECYCLE', 1800)
+    DB_POOL_TIMEOUT = env_int('DB_POOL_TIMEOUT', 30)
+    WTF_CSRF_CHECK_DEFAULT = False
+    WTF_CSRF_ENABLED = True
+    REQUEST_TIMING = os.environ.get('REQUEST_TIMING') == '1'
+    # Rendered job fragments: in-process LRU, or Redis shared by all processes when set
+    FRAGMENT_CACHE_URL = os.environ.get('FRAGMENT_CACHE_URL')
+    # Recommendation indexes are updated in place for changes made by this
+    # process, and reloaded after this many seconds to see the other processes'
+    RECOMMENDATIONS_MAX_AGE = env_int('RECOMMENDATIONS_MAX_AGE', 300)
+    # werkzeug hash method for new passwords, e.g. pbkdf2:sha256:600000 or
+    # scrypt:32768:8:1; older hashes are upgraded when their user logs in.
+    # At most PASSWORD_HASH_WORKERS hashes run at once per process.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', 2)
+    # Login and sign-up token buckets live in this process, or in Redis
+    # shared by every process when set
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL')
+    # Live notifications reach only the streams opened on the publishing
+    # process, or those of every process through Redis when set
+    EVENTS_BROKER_URL = os.environ.get('EVENTS_BROKER_URL')
+
+class DevelopmentConfig(Config):
+    SQLALCHEMY_ECHO = os.environ.get('SQLALCHEMY_ECHO') == '1'
+
+class ProductionConfig(Config):
+    # No fallback: sessions signed with a key from the source can be forged
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', '1') == '1'
+    REMEMBER_COOKIE_SECURE = SESSION_COOKIE_SECURE
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    IMAGE_WORKERS = 0
+
+configs = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+def load_config(app, name=None):
+    """Load the config class named by APP_CONFIG (development by default)."""
+    name = name or os.environ.get('APP_CONFIG', 'development')
+    if name not in configs:
+        raise ValueError(f"Unknown APP_CONFIG {name!r}, expected one of {', '.join(configs)}")
+    app.config.from_object(configs[name])
+    if not app.config['SECRET_KEY']:
+        raise RuntimeError(f'SECRET_KEY must be set in the environment for APP_CONFIG {name!r}')
+
+def engine_options(config):
+    """SQLAlchemy engine options for a server database; SQLite uses its own pooling."""
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': True,
+    }
@@ -0,0 +1,60 @@
+import random
+import time
+from functools import partial, wraps
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from . import db
+
+# Applied to every new SQLite connection; override with the SQLITE_PRAGMAS config
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers no longer block the writer, nor the writer readers
+    'synchronous': 'NORMAL',      # safe with WAL; fsync at checkpoints instead of every commit
+    'busy_timeout': 5000,         # ms to wait for a lock before failing with "database is locked"
+    'mmap_size': 268435456,       # 256 MiB of the file read through memory mapping
+    'cache_size': -65536,         # 64 MiB page cache per connection (negative means KiB)
+    'temp_store': 'MEMORY',       # temporary tables and sort b-trees in memory
+}
+
+def apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+def is_busy(error):
+    """True if an OperationalError means another connection holds the lock."""
+    message = str(error.orig).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+def retry_on_busy(view):
+    """Re-run a write view when SQLite reports the database as locked.
+
+    busy_timeout covers most waits, but a transaction that read before it
+    writes can still fail at once if another writer committed in between.
+    The session is rolled back and the view run again, up to
+    DB_BUSY_RETRIES times with jittered exponential backoff.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        retries = current_app.config['DB_BUSY_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as e:
+                if not is_busy(e) or attempt == retries:
+                    raise
+                db.session.rollback()
+                time.sleep(current_app.config['DB_BUSY_BACKOFF'] * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
+
+def init_app(app):
+    """Tune SQLite connections; call after db.init_app so the engines exist."""
+    pragmas = {**DEFAULT_SQLITE_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {})}
+    pragmas = {name: value for name, value in pragmas.items() if value is not None}
+    app.config.setdefault('DB_BUSY_RETRIES', 3)
+    app.config.setdefault('DB_BUSY_BACKOFF', 0.05)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', partial(apply_pragmas, pragmas))
@@ -0,0 +1,211 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from . import db
+from .forms import MOROCCAN_CITIES, PROFESSIONS
+from .models import User, Skill, Job, JobPicture, Application, Review, ApplicationStatus, job_skill_tags, user_skill_tags
+from .tags import add_tags, tag_ids
+from .passwords import hash_password
+
+CITIES = [value for value, _ in MOROCCAN_CITIES if value != 'All']
+TRADES = [value for value, _ in PROFESSIONS if value != 'All']
+
+FIRST_NAMES = ['Youssef', 'Fatima', 'Mohamed', 'Khadija', 'Omar', 'Salma', 'Hamza', 'Imane',
+               'Ayoub', 'Sara', 'Mehdi', 'Nadia', 'Rachid', 'Hajar', 'Karim', 'Laila']
+LAST_NAMES = ['Alaoui', 'Benali', 'Bennani', 'Chraibi', 'El Idrissi', 'Fassi', 'Haddad',
+              'Lahlou', 'Mansouri', 'Naciri', 'Ouazzani', 'Saidi', 'Tazi', 'Zniber']
+SKILLS = {
+    'Electrician': ['wiring', 'lighting', 'circuit breakers', 'solar panels'],
+    'Barber': ['fades', 'beard trim', 'shaving', 'hair coloring'],
+    'Tailor': ['alterations', 'embroidery', 'suits', 'djellaba'],
+    'Plumber': ['pipes', 'leak repair', 'water heaters', 'drains'],
+    'Cleaner': ['deep cleaning', 'carpets', 'windows', 'move-out cleaning'],
+    'Gardener': ['lawn care', 'pruning', 'irrigation', 'landscaping'],
+    'Painter': ['interior painting', 'exterior painting', 'plastering', 'wallpaper'],
+    'Carpenter': ['furniture', 'doors', 'cabinets', 'flooring'],
+    'Mechanic': ['engines', 'brakes', 'diagnostics', 'tyres'],
+    'Driver': ['moving', 'deliveries', 'airport transfers', 'long distance'],
+}
+TASKS = {
+    'Electrician': ['Install ceiling lights', 'Replace the fuse box', 'Rewire the kitchen'],
+    'Barber': ['Haircut at home', 'Wedding grooming', 'Weekly beard trim'],
+    'Tailor': ['Hem three pairs of trousers', 'Sew a kaftan', 'Adjust a suit'],
+    'Plumber': ['Fix a leaking sink', 'Install a water heater', 'Unblock the drains'],
+    'Cleaner': ['Clean a three-room flat', 'Office cleaning', 'Clean after renovation'],
+    'Gardener': ['Trim the hedges', 'Set up drip irrigation', 'Weekly garden upkeep'],
+    'Painter': ['Paint the living room', 'Repaint the facade', 'Plaster and paint a bedroom'],
+    'Carpenter': ['Build kitchen cabinets', 'Repair a wooden door', 'Lay parquet flooring'],
+    'Mechanic': ['Replace brake pads', 'Engine diagnostics', 'Change oil and filters'],
+    'Driver': ['Help moving house', 'Airport pickup', 'Deliver furniture to Rabat'],
+}
+DURATIONS = ['1 day', '2 days', '1 week', '2 weeks', '1 month']
+PICTURES = ['LNDM6.jpg', 'background1.jpg', 'background2.jpg', 'feature2.jpg', 'images.jpeg', 'testimonial2.jpg']
+
+def user_rows(start_id, count, password, tags, seed, now):
+    """Users with ids start_id..start_id+count-1, and their skills.
+
+    tags maps each skill name to its SkillTag id.
+    """
+    rng = random.Random(seed)
+    users, skills, user_tags = [], [], []
+    for user_id in range(start_id, start_id + count):
+        profession = rng.choice(TRADES)
+        users.append({
+            'id': user_id,
+            'email': f'user{user_id}@example.com',
+            'username': f'user{user_id}',
+            'password': password,
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'location': rng.choice(CITIES),
+            'profession': profession,
+            'date_of_birth': (now - timedelta(days=rng.randint(18 * 365, 70 * 365))).date(),
+            'about_me': f'{profession} with {rng.randint(1, 30)} years of experience.',
+            'created_at': now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400)),
+        })
+        for name in rng.sample(SKILLS[profession], rng.randint(0, 3)):
+            skills.append({'name': name, 'user_id': user_id})
+            user_tags.append({'user_id': user_id, 'tag_id': tags[name]})
+    return {'user': users, 'skill': skills, 'user_skill_tags': user_tags}
+
+def job_rows(start_id, count, user_ids, applications_per_job, tags, seed, now):
+    """Jobs with ids start_id..start_id+count-1, with their applications, reviews, pictures and skill tags.
+
+    user_ids are the ids of the existing users to draw posters and workers from.
+    """
+    rng = random.Random(seed)
+    jobs, applications, reviews, pictures, job_tags = [], [], [], [], []
+    for job_id in range(start_id, start_id + count):
+        profession = rng.choice(TRADES)
+        poster_id = rng.choice(user_ids)
+        date_posted = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        required_skills = rng.sample(SKILLS[profession], 2)
+        status = rng.choices([ApplicationStatus.OPEN, ApplicationStatus.IN_PROGRESS, ApplicationStatus.COMPLETED],
+                             weights=[70, 15, 15])[0]
+        jobs.append({
+            'id': job_id,
+            'title': rng.choice(TASKS[profession]),
+            'description': f'Looking for an experienced {profession.lower()}. '
+                           f'{rng.choice(TASKS[profession])} as soon as possible.',
+            'profession': profession,
+            'location': rng.choice(CITIES),
+            'status': status,
+            'date_posted': date_posted,
+            'poster_id': poster_id,
+            'budget': float(rng.randrange(100, 10000, 50)),
+            'expected_duration': rng.choice(DURATIONS),
+            'required_skills': ', '.join(required_skills),
+        })
+        job_tags.extend({'job_id': job_id, 'tag_id': tags[name]} for name in required_skills)
+
+        # Workers never apply to their own job, and apply at most once
+        candidates = min(rng.randint(0, 2 * applications_per_job), len(user_ids) - 1)
+        workers = set()
+        while len(workers) < candidates:
+            worker_id = rng.choice(user_ids)
+            if worker_id != poster_id:
+                workers.add(worker_id)
+        accepted = rng.choice(sorted(workers)) if workers and status != ApplicationStatus.OPEN else None
+        for worker_id in workers:
+            if status == ApplicationStatus.OPEN:
+                application_status = ApplicationStatus.IN_PROGRESS
+            elif worker_id == accepted:
+                application_status = ApplicationStatus.ACCEPTED
+            else:
+                application_status = ApplicationStatus.REJECTED
+            applications.append({
+                'job_id': job_id,
+                'worker_id': worker_id,
+                'date_applied': date_posted + timedelta(seconds=rng.randint(60, 7 * 86400)),
+                'status': application_status,
+            })
+        if accepted and status == ApplicationStatus.COMPLETED:
+            reviews.append({
+                'job_id': job_id,
+                'reviewer_id': poster_id,
+                'reviewee_id': accepted,
+                'rating': rng.choices([1, 2, 3, 4, 5], weights=[5, 5, 15, 35, 40])[0],
+                'comment': rng.choice(['Great work!', 'On time and tidy.', 'Good value.', 'Would hire again.']),
+                'date': date_posted + timedelta(days=rng.randint(8, 30)),
+            })
+        for filename in rng.sample(PICTURES, rng.randint(0, 2)):
+            pictures.append({'filename': filename, 'job_id': job_id})
+    return {'job': jobs, 'application': applications, 'review': reviews, 'job_picture': pictures,
+            'job_skill_tags': job_tags}
+
+TABLES = {model.__tablename__: model.__table__ for model in (User, Skill, Job, Application, Review, JobPicture)}
+TABLES.update({table.name: table for table in (job_skill_tags, user_skill_tags)})
+
+def insert_chunk(rows):
+    """Bulk insert one generated chunk with executemany, parents first, in one transaction."""
+    for name, table_rows in rows.items():
+        if table_rows:
+            db.session.execute(TABLES[name].insert(), table_rows)
+    db.session.commit()
+
+def chunks(start_id, total, chunk_size):
+    """Split ids start_id..start_id+total-1 into (chunk start, chunk size) pairs."""
+    return [(chunk_start, min(chunk_size, start_id + total - chunk_start))
+            for chunk_start in range(start_id, start_id + total, chunk_size)]
+
+def generate(users, jobs, applications_per_job=3, chunk_size=10000, processes=1, seed=0, progress=print):
+    """Add users and jobs, with skills, applications, reviews and pictures, to the database.
+
+    Rows are generated in chunks, optionally across a process pool, and
+    inserted in bulk. Every generated user shares one password hash; the
+    password is 'password'.
+    """
+    now = datetime.utcnow()
+    password = hash_password('password')
+    first_user = (db.session.query(func.max(User.id)).scalar() or 0) + 1
+    first_job = (db.session.query(func.max(Job.id)).scalar() or 0) + 1
+    skill_names = [name for names in SKILLS.values() for name in names]
+    add_tags(skill_names)
+    db.session.commit()
+    tags = tag_ids(skill_names)
+
+    executor = ProcessPoolExecutor(processes) if processes > 1 else None
+    mapper = executor.map if executor else map
+    try:
+        user_chunks = chunks(first_user, users, chunk_size)
+        for i, rows in enumerate(mapper(user_rows,
+                                        [start for start, _ in user_chunks],
+                                        [count for _, count in user_chunks],
+                                        [password] * len(user_chunks),
+                                        [tags] * len(user_chunks),
+                                        [seed * 1000003 + i for i in range(len(user_chunks))],
+                                        [now] * len(user_chunks))):
+            insert_chunk(rows)
+            progress(f'users: {user_chunks[i][0] + user_chunks[i][1] - first_user}/{users}')
+
+        # Ids of deleted users leave gaps, so draw from the ids that exist
+        user_ids = db.session.scalars(db.select(User.id).order_by(User.id)).all() if jobs else []
+        if len(user_ids) < 2 and jobs:
+            raise ValueError('At least two users are needed to generate jobs.')
+        job_chunks = chunks(first_job, jobs, chunk_size)
+        for i, rows in enumerate(mapper(job_rows,
+                                        [start for start, _ in job_chunks],
+                                        [count for _, count in job_chunks],
+                                        [user_ids] * len(job_chunks),
+                                        [applications_per_job] * len(job_chunks),
+                                        [tags] * len(job_chunks),
+                                        [seed * 1000003 + 500009 + i for i in range(len(job_chunks))],
+                                        [now] * len(job_chunks))):
+            insert_chunk(rows)
+            progress(f'jobs: {job_chunks[i][0] + job_chunks[i][1] - first_job}/{jobs}')
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if db.engine.dialect.name == 'postgresql':
+        # The explicit ids bypassed the serial sequences; move them past the new rows
+        for table in (User.__table__, Job.__table__):
+            db.session.execute(db.text(f"""SELECT setval(pg_get_serial_sequence('"{table.name}"', 'id'),
+                                                      (SELECT MAX(id) FROM "{table.name}"))"""))
+        db.session.commit()
+
+    # Refresh planner statistics for the new data
+    if db.engine.dialect.name in ('sqlite', 'postgresql'):
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
@@ -0,0 +1,152 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app
+
+logger = logging.getLogger('app.events')
+
+class Subscription:
+    """Events for one open stream, dropped past max_pending if the client stops reading."""
+
+    def __init__(self, bus, user_id, max_pending):
+        self.bus = bus
+        self.user_id = user_id
+        self.pending = queue.Queue(max_pending)
+
+    def get(self, timeout):
+        """The next (id, event, data) triple, or None after timeout seconds without one."""
+        try:
+            return self.pending.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    """In-process pub/sub of events by user id.
+
+    Only streams opened on this process see what it publishes; with
+    EVENTS_BROKER_URL set, RedisBroker relays events between processes.
+    Every event gets an increasing id, and the last backlog_size events of
+    each user are kept, for the backlog_users most recently notified users,
+    so a stream reopened with the id it last saw misses nothing.
+    """
+
+    def __init__(self, max_pending, backlog_size, backlog_users):
+        self.max_pending = max_pending
+        self.backlog_size = backlog_size
+        self.backlog_users = backlog_users
+        self.subscriptions = {}
+        self.backlogs = OrderedDict()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id, last_id=None):
+        """Open a subscription, holding the user's backlogged events after last_id if given."""
+        subscription = Subscription(self, user_id, self.max_pending)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+            if last_id is not None:
+                for item in self.backlogs.get(user_id, ()):
+                    if item[0] > last_id:
+                        try:
+                            subscription.pending.put_nowait(item)
+                        except queue.Full:
+                            break
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def deliver(self, id, user_id, event, data):
+        item = (id, event, data)
+        with self.lock:
+            backlog = self.backlogs.get(user_id)
+            if backlog is None:
+                backlog = self.backlogs[user_id] = deque(maxlen=self.backlog_size)
+            backlog.append(item)
+            self.backlogs.move_to_end(user_id)
+            while len(self.backlogs) > self.backlog_users:
+                self.backlogs.popitem(last=False)
+            # Taken with the backlog, so a stream subscribing meanwhile gets the event exactly once
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.pending.put_nowait(item)
+            except queue.Full:
+                pass
+
+    def publish(self, user_id, event, data):
+        self.deliver(next(self.ids), user_id, event, data)
+
+class RedisBroker(EventBus):
+    """Event bus shared by every app process, over Redis pub/sub on a Redis-compatible client.
+
+    Published events go through the broker; a listener thread per process
+    hands them to the streams opened on it. Event ids come from a counter
+    on the server, so a stream can reopen on any process.
+    """
+
+    CHANNEL = 'events'
+    ID_KEY = 'events:id'
+
+    def __init__(self, client, max_pending, backlog_size, backlog_users):
+        super().__init__(max_pending, backlog_size, backlog_users)
+        self.client = client
+        self.listener = threading.Thread(target=self.listen, name='event-broker', daemon=True)
+        self.listener.start()
+
+    def publish(self, user_id, event, data):
+        self.client.publish(self.CHANNEL, json.dumps([self.client.incr(self.ID_KEY), user_id, event, data]))
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    self.deliver(*json.loads(message['data']))
+            except Exception:
+                # Events published while disconnected are lost; streams carry on
+                logger.exception('Event broker connection lost, reconnecting')
+                time.sleep(1)
+
+def publish(user_id, event, **data):
+    """Push an event to the open streams of a user; call after committing the change it reports."""
+    current_app.extensions['events'].publish(user_id, event, data)
+
+def format_event(id, event, data):
+    return f'id: {id}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
+
+def init_app(app):
+    # Seconds between keep-alive comments, and before a stream ends and the
+    # browser reconnects. An open stream holds a worker thread the whole
+    # time, so streams are short and only the inbox, threads and the user's
+    # own profile open one; serve with a threaded or async worker class
+    # (gunicorn -k gthread or gevent) so they do not starve other requests.
+    app.config.setdefault('EVENTS_HEARTBEAT', 10)
+    app.config.setdefault('EVENTS_STREAM_SECONDS', 30)
+    app.config.setdefault('EVENTS_MAX_PENDING', 100)
+    # Events kept per user for streams that reconnect, and for how many users
+    app.config.setdefault('EVENTS_BACKLOG', 20)
+    app.config.setdefault('EVENTS_BACKLOG_USERS', 10000)
+    app.config.setdefault('EVENTS_BROKER_URL', None)
+    sizes = app.config['EVENTS_MAX_PENDING'], app.config['EVENTS_BACKLOG'], app.config['EVENTS_BACKLOG_USERS']
+    if app.config['EVENTS_BROKER_URL']:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('EVENTS_BROKER_URL needs the redis package: pip install redis')
+        bus = RedisBroker(redis.Redis.from_url(app.config['EVENTS_BROKER_URL']), *sizes)
+    else:
+        bus = EventBus(*sizes)
+    app.extensions['events'] = bus
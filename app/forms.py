@@ -1,7 +1,7 @@
 #forms.py
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField, FileField, SelectField, DateField, MultipleFileField, IntegerField, FloatField, BooleanField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange
+from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, NumberRange, Optional
 from .models import User
 from flask_wtf.file import FileAllowed
 from datetime import datetime
@@ -74,6 +74,8 @@ class UpdateProfileForm(FlaskForm):
 
 # search jobs form
 class SearchJobsForm(FlaskForm):
+    keywords = StringField('Keywords', validators=[Optional(), Length(max=100)])
+    skills = StringField('Skills', validators=[Optional(), Length(max=200)])
     location = SelectField('Location', choices=MOROCCAN_CITIES, validators=[DataRequired()])
     profession = SelectField('Profession', choices=PROFESSIONS, validators=[DataRequired()])
     submit = SubmitField('Search')
@@ -90,11 +92,31 @@ class JobForm(FlaskForm):
     pictures = MultipleFileField('Job Pictures', validators=[FileAllowed(['jpg', 'png', 'jpeg'], 'Images only!')])
     submit = SubmitField('Post Job')
 
+# Saved job search, matched against every job posted after it
+class SavedSearchForm(FlaskForm):
+    location = SelectField('Location', choices=MOROCCAN_CITIES, default='All')
+    profession = SelectField('Profession', choices=PROFESSIONS, default='All')
+    keywords = StringField('Keywords', validators=[Optional(), Length(max=100)])
+    min_budget = FloatField('Minimum budget', validators=[Optional(), NumberRange(min=0)])
+    max_budget = FloatField('Maximum budget', validators=[Optional(), NumberRange(min=0)])
+    submit = SubmitField('Save Search')
+
+    def validate_max_budget(self, max_budget):
+        if max_budget.data is not None and self.min_budget.data is not None and max_budget.data < self.min_budget.data:
+            raise ValidationError('Maximum budget must not be below the minimum.')
 
 # Search Workers Form
+WORKER_SORTS = [('rating', 'Top rated'), ('reviews', 'Most reviewed'), ('recent', 'Newest')]
+
 class SearchWorkersForm(FlaskForm):
+    # Submitted with GET, so a CSRF token would end up in URLs, history and logs
+    class Meta:
+        csrf = False
+
     location = SelectField('Location', choices=MOROCCAN_CITIES, validators=[DataRequired()])
     profession = SelectField('Profession', choices=PROFESSIONS, validators=[DataRequired()])
+    skills = StringField('Skills', validators=[Optional(), Length(max=200)])
+    sort = SelectField('Sort by', choices=WORKER_SORTS, default='rating')
     submit = SubmitField('Search')
 
 # Add Skill Form
@@ -111,6 +133,11 @@ class AddExperienceForm(FlaskForm):
     description = TextAreaField('Description')
     submit = SubmitField('Add Experience')
 
+# Message Form for sending a message to another user
+class MessageForm(FlaskForm):
+    content = TextAreaField('Message', validators=[DataRequired(), Length(max=2000)])
+    submit = SubmitField('Send')
+
 # Dummy Form for generic actions like delete
 class DummyForm(FlaskForm):
     submit = SubmitField('Delete')
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from flask import current_app, render_template
+from markupsafe import Markup
+from . import db
+from .models import Job
+
+# Cached fragment kinds and the template each one renders with a job
+FRAGMENTS = {
+    'card': 'job/job_card.html',
+    'details': 'job/job_details_body.html',
+}
+
+class LRUCache:
+    """In-process cache that evicts the least recently used entry past max_entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+class RedisCache:
+    """Cache shared by every app process, on a Redis-compatible client."""
+
+    def __init__(self, client, ttl):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(key, value, ex=self.ttl)
+
+    def delete(self, *keys):
+        self.client.delete(*keys)
+
+def fragment_key(kind, job_id):
+    return f'fragment:{kind}:{job_id}'
+
+def job_fragment(kind, job, **context):
+    """Render a job fragment, or return it from the cache if this version was rendered before.
+
+    Entries hold the job version they were rendered from, so a stale entry
+    written by a request that raced with an update is never served.
+    """
+    cache = current_app.extensions['fragment_cache']
+    key = fragment_key(kind, job.id)
+    version = str(job.version)
+    cached = cache.get(key)
+    if cached is not None:
+        cached_version, _, html = cached.partition('\n')
+        if cached_version == version:
+            return Markup(html)
+    html = render_template(FRAGMENTS[kind], job=job, **context)
+    cache.set(key, f'{version}\n{html}')
+    return Markup(html)
+
+def invalidate_job(job_id):
+    """Drop every cached fragment of a job; call after committing a change to it."""
+    current_app.extensions['fragment_cache'].delete(*(fragment_key(kind, job_id) for kind in FRAGMENTS))
+
+def invalidate_poster(user_id):
+    """Drop the cached fragments of every job a user posted; call after committing a change to their name."""
+    job_ids = db.session.scalars(db.select(Job.id).where(Job.poster_id == user_id)).all()
+    current_app.extensions['fragment_cache'].delete(*(fragment_key(kind, job_id)
+                                                      for job_id in job_ids for kind in FRAGMENTS))
+
+def init_app(app):
+    app.config.setdefault('FRAGMENT_CACHE_SIZE', 4096)
+    app.config.setdefault('FRAGMENT_CACHE_URL', None)
+    app.config.setdefault('FRAGMENT_CACHE_TTL', 3600)
+    if app.config['FRAGMENT_CACHE_URL']:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('FRAGMENT_CACHE_URL needs the redis package: pip install redis')
+        cache = RedisCache(redis.Redis.from_url(app.config['FRAGMENT_CACHE_URL']), app.config['FRAGMENT_CACHE_TTL'])
+    else:
+        cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+    app.extensions['fragment_cache'] = cache
+    app.jinja_env.globals['job_fragment'] = job_fragment
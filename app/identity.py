@@ -0,0 +1,53 @@
+import json
+import time
+from flask import current_app
+from flask_login import current_user
+from sqlalchemy.orm import make_transient_to_detached
+from . import db
+from .models import User
+
+# User columns cached for current_user; the rest load from the database if a page reads them
+IDENTITY_COLUMNS = ('id', 'email', 'username', 'first_name', 'last_name', 'profile_picture', 'location', 'profession')
+
+def identity_key(user_id):
+    return f'user:{user_id}'
+
+def load_user(user_id):
+    """The logged-in user for Flask-Login, from the cache when possible.
+
+    Identity columns are kept in the fragment cache for USER_CACHE_TTL
+    seconds and merged into the session without a query. Relationships
+    and uncached columns load lazily, but the cached columns may be stale
+    and are taken as the database state: views that change the user must
+    work on fresh_user() instead.
+    """
+    cache = current_app.extensions['fragment_cache']
+    cached = cache.get(identity_key(user_id))
+    if cached is not None:
+        cached_at, _, fields = cached.partition('\n')
+        if time.time() - float(cached_at) < current_app.config['USER_CACHE_TTL']:
+            user = User(**json.loads(fields))
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+    user = db.session.get(User, user_id)
+    if user is not None:
+        remember_user(user)
+    return user
+
+def fresh_user():
+    """current_user reloaded from the database, so changes to it are compared with, and saved over, the real row."""
+    return db.session.get(User, current_user.id, populate_existing=True)
+
+def remember_user(user):
+    """Cache the identity of a user loaded in full, such as one who just logged in."""
+    fields = {column: getattr(user, column) for column in IDENTITY_COLUMNS}
+    current_app.extensions['fragment_cache'].set(identity_key(user.id), f'{time.time()}\n{json.dumps(fields)}')
+
+def forget_user(user_id):
+    """Drop the cached identity of a user; call after committing a change to it."""
+    current_app.extensions['fragment_cache'].delete(identity_key(user_id))
+
+def init_app(app):
+    # Identities share the fragment cache, see fragments.py. The TTL bounds
+    # how long another process can serve an identity changed elsewhere.
+    app.config.setdefault('USER_CACHE_TTL', 60)
@@ -0,0 +1,113 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from PIL import Image, ImageOps
+from werkzeug.utils import secure_filename
+from . import db
+from .database import retry_on_busy
+from .models import Job, JobPicture, PictureStatus
+from .storage import store, file_path, write_file
+from .fragments import invalidate_job
+
+# Resized variants generated for each job picture, as (max width, max height)
+VARIANTS = {
+    'thumb': (200, 150),
+    'card': (400, 300),
+    'full': (1600, 1200),
+}
+
+class ImagePipeline:
+    """Resize uploaded job pictures on a bounded thread pool, off the request path.
+
+    At most IMAGE_WORKERS pictures are resized at once and at most
+    IMAGE_QUEUE_SIZE wait; when the queue is full the picture is resized
+    on the calling thread instead. With IMAGE_WORKERS = 0 every picture is
+    resized synchronously. Pillow releases the GIL while resizing, so
+    threads scale with cores.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        workers = app.config['IMAGE_WORKERS']
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='images') if workers else None
+        self.slots = threading.BoundedSemaphore(workers + app.config['IMAGE_QUEUE_SIZE'])
+
+    def submit(self, picture_id, source):
+        if self.executor and self.slots.acquire(blocking=False):
+            future = self.executor.submit(self.process, picture_id, source)
+            future.add_done_callback(lambda _: self.slots.release())
+        else:
+            self.process(picture_id, source)
+
+    def process(self, picture_id, source):
+        """Write every variant of source, then record the outcome on the picture."""
+        folder = os.path.dirname(source)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        try:
+            with Image.open(source) as img:
+                img = ImageOps.exif_transpose(img).convert('RGB')
+                for name, size in VARIANTS.items():
+                    variant = img.copy()
+                    variant.thumbnail(size)
+                    buffer = io.BytesIO()
+                    variant.save(buffer, 'JPEG', quality=85, optimize=True)
+                    # Identical uploads may be processed concurrently
+                    write_file(os.path.join(folder, f'{stem}_{name}.jpg'), buffer.getvalue())
+            status = PictureStatus.READY
+        except Exception as e:
+            self.app.logger.error(f"Error processing picture {picture_id}: {str(e)}")
+            status = PictureStatus.FAILED
+
+        with self.app.app_context():
+            try:
+                job_id = record_status(picture_id, status)
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception(f"Error recording the status of picture {picture_id}")
+                # Let pages stop waiting on the picture, if the database lets us
+                try:
+                    job_id = record_status(picture_id, PictureStatus.FAILED)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception(f"Error marking picture {picture_id} as failed")
+                    return
+            invalidate_job(job_id)
+
+@retry_on_busy
+def record_status(picture_id, status):
+    """Set a picture's status and return its job id."""
+    job_id = db.session.execute(db.update(JobPicture).where(JobPicture.id == picture_id)
+                                .values(status=status).returning(JobPicture.job_id)).scalar()
+    # A new job version makes cached pages and fragments showing the picture stale
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(version=Job.version + 1))
+    db.session.commit()
+    return job_id
+
+def stage_upload(file):
+    """Store an upload by content and return (filename, status) for its JobPicture.
+
+    The original is kept as the stored file; identical uploads share it and
+    its variants, so a picture that was seen before is ready straight away.
+    """
+    _, ext = os.path.splitext(secure_filename(file.filename))
+    # Rewind in case the request is being retried
+    file.stream.seek(0)
+    filename = store(file.read(), ext)
+    stem = os.path.splitext(filename)[0]
+    if all(os.path.exists(file_path(f'{stem}_{name}.jpg')) for name in VARIANTS):
+        return filename, PictureStatus.READY
+    return filename, PictureStatus.PROCESSING
+
+def process_pictures(pictures):
+    """Queue resizing for newly committed JobPicture rows that still need it."""
+    pipeline = current_app.extensions['images']
+    for picture in pictures:
+        if picture.status == PictureStatus.PROCESSING:
+            pipeline.submit(picture.id, file_path(picture.filename))
+
+def init_app(app):
+    app.config.setdefault('IMAGE_WORKERS', 2)
+    app.config.setdefault('IMAGE_QUEUE_SIZE', 32)
+    app.extensions['images'] = ImagePipeline(app)
@@ -0,0 +1,82 @@
+import json
+import logging
+import time
+from flask import g, request, has_app_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('app.timing')
+
+def _timing():
+    """The timing record of the current request, or None when not profiling."""
+    if has_app_context():
+        return g.get('timing')
+    return None
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _timing() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _timing()
+    if timing is not None and conn.info.get('query_start'):
+        timing['queries'] += 1
+        timing['db'] += time.perf_counter() - conn.info['query_start'].pop()
+
+def _before_render(sender, template, context, **extra):
+    timing = _timing()
+    if timing is not None:
+        timing['render_start'].append(time.perf_counter())
+
+def _after_render(sender, template, context, **extra):
+    timing = _timing()
+    if timing is not None and timing['render_start']:
+        start = timing['render_start'].pop()
+        # Only count the outermost template when renders are nested
+        if not timing['render_start']:
+            timing['template'] += time.perf_counter() - start
+
+def server_timing(timing, total):
+    """Format a timing record as a Server-Timing header value (durations in ms)."""
+    return ', '.join([
+        f'db;dur={timing["db"] * 1000:.1f};desc="{timing["queries"]} queries"',
+        f'tpl;dur={timing["template"] * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+def init_app(app):
+    """Record query count, SQL time, template time and total time of each request.
+
+    Enabled by the REQUEST_TIMING config flag. Results are sent in a
+    Server-Timing header and logged as JSON on the 'app.timing' logger.
+    Template time includes any queries lazily issued while rendering.
+    """
+    if not app.config.get('REQUEST_TIMING'):
+        return
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_timing():
+        g.timing = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'template': 0.0, 'render_start': []}
+
+    @app.after_request
+    def finish_timing(response):
+        timing = g.pop('timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing['start']
+        response.headers['Server-Timing'] = server_timing(timing, total)
+        logger.info(json.dumps({
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': timing['queries'],
+            'db_ms': round(timing['db'] * 1000, 2),
+            'template_ms': round(timing['template'] * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }))
+        return response
@@ -0,0 +1,88 @@
+import time
+from flask import current_app
+from flask_login import current_user
+from sqlalchemy import and_, case, false, func, or_, select, update
+from sqlalchemy.orm import load_only
+from . import db
+from .models import Message, User
+
+# User columns shown next to a conversation
+PARTNER_COLUMNS = (User.id, User.first_name, User.last_name, User.profile_picture)
+
+def conversations(user_id):
+    """Query of (latest Message, partner User, unread count) for each conversation of a user.
+
+    One pass of window functions over the user's messages: row_number picks
+    the latest message of each conversation and a windowed sum counts its
+    unread messages, so the inbox is a single statement however long the
+    threads are. Page it with keyset_page on Message.id.
+    """
+    partner = case((Message.sender_id == user_id, Message.receiver_id), else_=Message.sender_id)
+    unread = case((and_(Message.receiver_id == user_id, Message.is_read == false()), 1), else_=0)
+    ranked = (select(Message.id,
+                     partner.label('partner_id'),
+                     func.row_number().over(partition_by=partner, order_by=Message.id.desc()).label('rank'),
+                     func.sum(unread).over(partition_by=partner).label('unread'))
+              .where(or_(Message.sender_id == user_id, Message.receiver_id == user_id))
+              .subquery())
+    return (db.session.query(Message, User, ranked.c.unread)
+            .join(ranked, Message.id == ranked.c.id)
+            .join(User, User.id == ranked.c.partner_id)
+            .filter(ranked.c.rank == 1)
+            .options(load_only(*PARTNER_COLUMNS)))
+
+def thread(user_id, partner_id):
+    """Query of the messages between two users, both ways."""
+    return Message.query.filter(or_(and_(Message.sender_id == user_id, Message.receiver_id == partner_id),
+                                    and_(Message.sender_id == partner_id, Message.receiver_id == user_id)))
+
+def mark_read(user_id, partner_id, up_to_id):
+    """Mark what partner_id sent user_id, up to message up_to_id, as read in one UPDATE.
+
+    Returns how many messages changed; commit and forget_unread(user_id) if any did.
+    """
+    result = db.session.execute(update(Message)
+                                .where(Message.receiver_id == user_id,
+                                       Message.sender_id == partner_id,
+                                       Message.is_read == false(),
+                                       Message.id <= up_to_id)
+                                .values(is_read=True)
+                                .execution_options(synchronize_session=False))
+    return result.rowcount
+
+def unread_query(user_id):
+    return (db.session.query(func.count(Message.id))
+            .filter(Message.receiver_id == user_id, Message.is_read == false()))
+
+def unread_key(user_id):
+    return f'unread:{user_id}'
+
+def unread_count(user_id):
+    """Messages user_id has not read yet, cached for MESSAGES_UNREAD_TTL seconds.
+
+    Entries are dropped when the count changes in this process (or in any
+    process with a shared FRAGMENT_CACHE_URL); the TTL bounds how long a
+    per-process cache can miss changes made elsewhere.
+    """
+    cache = current_app.extensions['fragment_cache']
+    cached = cache.get(unread_key(user_id))
+    if cached is not None:
+        count, _, cached_at = cached.partition(':')
+        if time.time() - float(cached_at) < current_app.config['MESSAGES_UNREAD_TTL']:
+            return int(count)
+    count = unread_query(user_id).scalar()
+    cache.set(unread_key(user_id), f'{count}:{time.time()}')
+    return count
+
+def forget_unread(user_id):
+    """Drop the cached unread count; call after committing a change to it."""
+    current_app.extensions['fragment_cache'].delete(unread_key(user_id))
+
+def unread_messages():
+    """Unread count for the navbar badge, 0 for anonymous users."""
+    return unread_count(current_user.id) if current_user.is_authenticated else 0
+
+def init_app(app):
+    # Unread counts share the fragment cache, see fragments.py
+    app.config.setdefault('MESSAGES_UNREAD_TTL', 30)
+    app.jinja_env.globals['unread_messages'] = unread_messages
@@ -1,8 +1,10 @@
 from . import db
 from flask_login import UserMixin
+from sqlalchemy import literal, text
 from sqlalchemy.sql import func
 from datetime import date, datetime
 import enum
+import os
 
 class ApplicationStatus(enum.Enum):
     OPEN = "Open"
@@ -11,17 +13,42 @@ class ApplicationStatus(enum.Enum):
     CANCELED = "Canceled"
     ACCEPTED = "Accepted"
     REJECTED = "Rejected"
+
+class PictureStatus(enum.Enum):
+    PROCESSING = "Processing"
+    READY = "Ready"
+    FAILED = "Failed"
     
 accepted_applicants = db.Table('accepted_applicants',
     db.Column('job_id', db.Integer, db.ForeignKey('job.id'), primary_key=True),
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
 )
 
+# Skills normalized into tags, linked to the jobs that require them and the workers
+# that have them. The primary keys look up one owner's tag; the indexes list a tag's owners.
+job_skill_tags = db.Table('job_skill_tags',
+    db.Column('job_id', db.Integer, db.ForeignKey('job.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('skill_tag.id'), primary_key=True),
+    db.Index('ix_job_skill_tags_tag_id_job_id', 'tag_id', 'job_id')
+)
+
+user_skill_tags = db.Table('user_skill_tags',
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('skill_tag.id'), primary_key=True),
+    db.Index('ix_user_skill_tags_tag_id_user_id', 'tag_id', 'user_id')
+)
+
 class User(db.Model, UserMixin):
+    __table_args__ = (
+        db.Index('ix_user_location_profession_rating', 'location', 'profession', 'rating'),
+        db.Index('ix_user_location_profession_review_count', 'location', 'profession', 'review_count', 'id'),
+        db.Index('ix_user_location_profession_id', 'location', 'profession', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(150), unique=True, nullable=False)
     username = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(150), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     first_name = db.Column(db.String(150), nullable=True)
     last_name = db.Column(db.String(150), nullable=True)
     location = db.Column(db.String(100))
@@ -32,6 +59,11 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
 
+    # Rating summary, maintained by triggers on review (see ratings.py)
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    review_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating = db.Column(db.Float, default=0, server_default='0', nullable=False)
+
     skills = db.relationship('Skill', backref='user', lazy=True, cascade="all, delete-orphan")
     experiences = db.relationship('Experience', backref='user', lazy=True, cascade="all, delete-orphan")
     certifications = db.relationship('Certification', backref='user', lazy=True, cascade="all, delete-orphan")
@@ -42,6 +74,7 @@ class User(db.Model, UserMixin):
 
     applications = db.relationship('Application', back_populates='applicant', lazy=True)
     accepted_jobs = db.relationship('Job', secondary=accepted_applicants, backref=db.backref('accepted_workers', lazy='dynamic'))
+    skill_tags = db.relationship('SkillTag', secondary=user_skill_tags, lazy=True)
 
     @property
     def age(self):
@@ -58,9 +91,20 @@ class Skill(db.Model):
     name = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Profile pages load these by user
+    __table_args__ = (db.Index('ix_skill_user_id', 'user_id'),)
+
     def __repr__(self):
         return f'<Skill {self.name}>'
 
+class SkillTag(db.Model):
+    """A skill name, case-folded (see tags.normalize), shared by jobs and workers."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<SkillTag {self.name}>'
+
 class Experience(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -70,6 +114,9 @@ class Experience(db.Model):
     description = db.Column(db.Text)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Profile pages load these by user
+    __table_args__ = (db.Index('ix_experience_user_id', 'user_id'),)
+
     def __repr__(self):
         return f'<Experience {self.title} at {self.company}>'
 
@@ -81,6 +128,9 @@ class Certification(db.Model):
     expiry_date = db.Column(db.Date)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Profile pages load these by user
+    __table_args__ = (db.Index('ix_certification_user_id', 'user_id'),)
+
     def __repr__(self):
         return f'<Certification {self.name}>'
 
@@ -99,7 +149,11 @@ class Job(db.Model):
     profession = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(100), nullable=False)
     status = db.Column(db.Enum(ApplicationStatus), default=ApplicationStatus.OPEN, nullable=False)
-    date_posted = db.Column(db.DateTime, default=func.now(), nullable=False)
+    # Set in Python, not by CURRENT_TIMESTAMP: SQLite compares the stored text, and
+    # keyset cursors are bound with microseconds, so every row must store them too
+    date_posted = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped by every UPDATE of the row, so cached renderings can tell they are stale
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=text('version + 1'))
     poster_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     budget = db.Column(db.Float, nullable=True)
@@ -109,6 +163,26 @@ class Job(db.Model):
     applications = db.relationship('Application', back_populates='job', lazy=True)
     reviews = db.relationship('Review', back_populates='job', lazy=True)
     pictures = db.relationship('JobPicture', backref='job', lazy=True, cascade="all, delete-orphan")
+    # delete_job removes the links itself, without loading them first
+    skill_tags = db.relationship('SkillTag', secondary=job_skill_tags, lazy=True, passive_deletes=True)
+
+    # Only open jobs are listed, so the listing indexes are partial on status
+    __table_args__ = (
+        db.Index('ix_job_open_date_posted', 'date_posted', 'id',
+                 sqlite_where=text("status = 'OPEN'"), postgresql_where=text("status = 'OPEN'")),
+        db.Index('ix_job_open_location_date_posted', 'location', 'date_posted', 'id',
+                 sqlite_where=text("status = 'OPEN'"), postgresql_where=text("status = 'OPEN'")),
+        db.Index('ix_job_open_profession_date_posted', 'profession', 'date_posted', 'id',
+                 sqlite_where=text("status = 'OPEN'"), postgresql_where=text("status = 'OPEN'")),
+        db.Index('ix_job_open_location_profession_date_posted', 'location', 'profession', 'date_posted', 'id',
+                 sqlite_where=text("status = 'OPEN'"), postgresql_where=text("status = 'OPEN'")),
+        db.Index('ix_job_poster_id_date_posted', 'poster_id', 'date_posted'),
+    )
+
+    @classmethod
+    def is_open(cls):
+        """Filter on OPEN status, inlined in the SQL so the partial indexes apply."""
+        return cls.status == literal(ApplicationStatus.OPEN, cls.status.type, literal_execute=True)
     
     def __repr__(self):
         return f'<Job {self.title}>'
@@ -117,6 +191,27 @@ class JobPicture(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    # None for pictures uploaded before resized variants existed
+    status = db.Column(db.Enum(PictureStatus), nullable=True)
+
+    # Job pages load these by job
+    __table_args__ = (db.Index('ix_job_picture_job_id', 'job_id'),)
+
+    def variant(self, size):
+        """Filename of a resized variant ('thumb', 'card' or 'full'), or the original upload."""
+        if self.status == PictureStatus.READY:
+            return f'{os.path.splitext(self.filename)[0]}_{size}.jpg'
+        return self.filename
+
+class StoredFile(db.Model):
+    # '<sha256 hex digest><ext>', see storage.py
+    name = db.Column(db.String(80), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=func.now())
+
+    def __repr__(self):
+        return f'<StoredFile {self.name} refs={self.ref_count}>'
 
 class Application(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)
@@ -128,6 +223,11 @@ class Application(db.Model):
     job = db.relationship('Job', back_populates='applications', lazy=True)
     applicant = db.relationship('User', back_populates='applications', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_application_job_id_worker_id', 'job_id', 'worker_id'),
+        db.Index('ix_application_worker_id_date_applied', 'worker_id', 'date_applied'),
+    )
+
     def __repr__(self):
         return f'<Application {self.id} for Job {self.job_id}>'
 
@@ -143,9 +243,48 @@ class Review(db.Model):
     job = db.relationship('Job', back_populates='reviews')
     reviewer = db.relationship('User', foreign_keys=[reviewer_id], back_populates='reviews_given')
     reviewee = db.relationship('User', foreign_keys=[reviewee_id], back_populates='reviews_received')
+
+    __table_args__ = (
+        db.Index('ix_review_job_id', 'job_id'),
+        db.Index('ix_review_reviewee_id_rating', 'reviewee_id', 'rating'),
+    )
     
     def __repr__(self):
         return f'<Review {self.id} by User {self.reviewer_id} for User {self.reviewee_id}>'
+
+class SavedSearch(db.Model):
+    """Job filters a user wants to hear about; 'All' matches any location or profession."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    location = db.Column(db.String(100), nullable=False, default='All')
+    profession = db.Column(db.String(50), nullable=False, default='All')
+    # Case-folded phrase looked for in the title, description and skills of a job
+    keywords = db.Column(db.String(100), nullable=True)
+    min_budget = db.Column(db.Float, nullable=True)
+    max_budget = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Inverted index from a new job's (location, profession) to the searches it can match
+        db.Index('ix_saved_search_location_profession', 'location', 'profession'),
+        db.Index('ix_saved_search_user_id', 'user_id'),
+    )
+
+    def __repr__(self):
+        return f'<SavedSearch {self.id} of User {self.user_id}>'
+
+class FeedItem(db.Model):
+    """A job that matched one of the user's saved searches when it was posted."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'job_id', name='uq_feed_item_user_id_job_id'),
+        db.Index('ix_feed_item_user_id_id', 'user_id', 'id'),
+        db.Index('ix_feed_item_job_id', 'job_id'),
+    )
     
     
 class Message(db.Model):
@@ -159,5 +298,13 @@ class Message(db.Model):
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     receiver = db.relationship('User', foreign_keys=[receiver_id], backref='received_messages')
 
+    __table_args__ = (
+        # A thread is read as both directions between two users, newest first
+        db.Index('ix_message_sender_id_receiver_id_id', 'sender_id', 'receiver_id', 'id'),
+        db.Index('ix_message_receiver_id_sender_id_id', 'receiver_id', 'sender_id', 'id'),
+        # Unread counts, in total and per sender
+        db.Index('ix_message_receiver_id_is_read_sender_id', 'receiver_id', 'is_read', 'sender_id'),
+    )
+
     def __repr__(self):
         return f'<Message {self.id} from User {self.sender_id} to User {self.receiver_id}>'
@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+# Parameters werkzeug fills in when a method leaves them out
+PBKDF2_DEFAULTS = ('pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS))
+SCRYPT_DEFAULTS = ('scrypt', str(2 ** 15), '8', '1')
+
+class HashingBusy(Exception):
+    """Every hashing slot is taken; the caller should ask the user to retry."""
+
+def full_method(method):
+    """A werkzeug hash method with every parameter spelled out, as it appears in stored hashes."""
+    parts = method.split(':')
+    defaults = {'pbkdf2': PBKDF2_DEFAULTS, 'scrypt': SCRYPT_DEFAULTS}.get(parts[0])
+    if defaults is None or len(parts) > len(defaults):
+        raise ValueError(f'Unsupported PASSWORD_HASH_METHOD {method!r}, expected pbkdf2[:hash[:iterations]] or scrypt[:n:r:p]')
+    return ':'.join(parts + list(defaults[len(parts):]))
+
+class PasswordHasher:
+    """Hash and check passwords on a bounded thread pool.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once on each app process,
+    so a burst of logins cannot take every core from the other routes;
+    hashlib releases the GIL, so the pool scales with cores. Up to
+    PASSWORD_HASH_QUEUE_SIZE more calls wait for a slot, and past that
+    HashingBusy is raised. With PASSWORD_HASH_WORKERS = 0 hashing runs on
+    the calling thread.
+    """
+
+    def __init__(self, app):
+        self.method = full_method(app.config['PASSWORD_HASH_METHOD'])
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='passwords') if workers else None
+        self.slots = threading.BoundedSemaphore(workers + app.config['PASSWORD_HASH_QUEUE_SIZE'])
+
+    def run(self, function, *args):
+        if not self.executor:
+            return function(*args)
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self.executor.submit(function, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        return self.run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether a stored hash was made with another method or cost than the configured one."""
+        return pwhash.split('$', 1)[0] != self.method
+
+def hash_password(password):
+    return current_app.extensions['passwords'].hash(password)
+
+def check_password(pwhash, password):
+    return current_app.extensions['passwords'].check(pwhash, password)
+
+def needs_rehash(pwhash):
+    return current_app.extensions['passwords'].needs_rehash(pwhash)
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+    app.config.setdefault('PASSWORD_HASH_QUEUE_SIZE', 64)
+    app.extensions['passwords'] = PasswordHasher(app)
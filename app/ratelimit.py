@@ -0,0 +1,112 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+
+# Atomic token bucket take on a Redis-compatible server: refill for the time
+# since the last take, spend one token if there is one, and expire the key
+# once the bucket would be full again
+TAKE_SCRIPT = """
+local capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = math.min(capacity, (tonumber(state[1]) or capacity) + (now - (tonumber(state[2]) or now)) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(tokens)}
+"""
+
+def refill(tokens, at, capacity, rate, now):
+    return min(capacity, tokens + (now - at) * rate)
+
+class MemoryStore:
+    """Token buckets of this process, evicting the least recently used past max_entries.
+
+    An evicted bucket starts full again, so max_entries should comfortably
+    exceed the clients seen within a refill period.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        """Spend a token from a bucket; return (allowed, tokens left)."""
+        with self.lock:
+            tokens, at = self.buckets.get(key, (capacity, now))
+            tokens = refill(tokens, at, capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_entries:
+                self.buckets.popitem(last=False)
+            return allowed, tokens
+
+class RedisStore:
+    """Token buckets shared by every app process, on a Redis-compatible client."""
+
+    def __init__(self, client):
+        self.script = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, now):
+        allowed, tokens = self.script(keys=[key], args=[capacity, rate, now])
+        return bool(allowed), float(tokens)
+
+def client_ip():
+    # Behind a proxy, wrap the app in werkzeug's ProxyFix so this is the client's address
+    return request.remote_addr or 'unknown'
+
+def check_limits(scope, account=None):
+    """Spend a token from the client's bucket for scope, and from the account's if given.
+
+    Returns None when the request may go ahead, or the seconds until it
+    may be retried. Call before doing any expensive work, such as hashing
+    a password. Limits are (attempts, seconds) pairs in RATELIMITS, keyed
+    by '<scope>:ip' and '<scope>:account'; a bucket holds that many
+    attempts and refills at that pace.
+    """
+    if not current_app.config['RATELIMIT_ENABLED']:
+        return None
+    store = current_app.extensions['ratelimit']
+    limits = current_app.config['RATELIMITS']
+    now = time.time()
+    buckets = [('ip', client_ip())]
+    if account:
+        buckets.append(('account', account.casefold()))
+    for kind, value in buckets:
+        limit = limits.get(f'{scope}:{kind}')
+        if not limit:
+            continue
+        capacity, period = limit
+        rate = capacity / period
+        allowed, tokens = store.take(f'ratelimit:{scope}:{kind}:{value}', capacity, rate, now)
+        if not allowed:
+            return math.ceil((1 - tokens) / rate)
+    return None
+
+def init_app(app):
+    app.config.setdefault('RATELIMIT_ENABLED', True)
+    app.config.setdefault('RATELIMITS', {
+        'login:ip': (20, 60),
+        'login:account': (5, 60),
+        'sign_up:ip': (10, 3600),
+    })
+    app.config.setdefault('RATELIMIT_STORAGE_URL', None)
+    app.config.setdefault('RATELIMIT_MAX_ENTRIES', 100000)
+    if app.config['RATELIMIT_STORAGE_URL']:
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATELIMIT_STORAGE_URL needs the redis package: pip install redis')
+        store = RedisStore(redis.Redis.from_url(app.config['RATELIMIT_STORAGE_URL']))
+    else:
+        store = MemoryStore(app.config['RATELIMIT_MAX_ENTRIES'])
+    app.extensions['ratelimit'] = store
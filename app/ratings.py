@@ -0,0 +1,78 @@
+from sqlalchemy import DDL, event, func, select
+from sqlalchemy.sql.functions import coalesce
+from . import db
+from .models import User, Review
+
+# Keep User.rating_sum, review_count and rating in step with the review table.
+# Triggers also cover bulk deletes such as the one in job.delete_job.
+RATING_TRIGGERS_DDL = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS review_rating_ai AFTER INSERT ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum + new.rating,
+                              review_count = review_count + 1,
+                              rating = CAST(rating_sum + new.rating AS REAL) / (review_count + 1)
+            WHERE id = new.reviewee_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS review_rating_ad AFTER DELETE ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum - old.rating,
+                              review_count = review_count - 1,
+                              rating = CASE WHEN review_count > 1
+                                            THEN CAST(rating_sum - old.rating AS REAL) / (review_count - 1)
+                                            ELSE 0 END
+            WHERE id = old.reviewee_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS review_rating_au AFTER UPDATE OF rating, reviewee_id ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum - old.rating,
+                              review_count = review_count - 1,
+                              rating = CASE WHEN review_count > 1
+                                            THEN CAST(rating_sum - old.rating AS REAL) / (review_count - 1)
+                                            ELSE 0 END
+            WHERE id = old.reviewee_id;
+            UPDATE "user" SET rating_sum = rating_sum + new.rating,
+                              review_count = review_count + 1,
+                              rating = CAST(rating_sum + new.rating AS REAL) / (review_count + 1)
+            WHERE id = new.reviewee_id;
+        END""",
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION review_rating_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "user" SET rating_sum = rating_sum - OLD.rating,
+                                  review_count = review_count - 1,
+                                  rating = CASE WHEN review_count > 1
+                                                THEN CAST(rating_sum - OLD.rating AS DOUBLE PRECISION) / (review_count - 1)
+                                                ELSE 0 END
+                WHERE id = OLD.reviewee_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE "user" SET rating_sum = rating_sum + NEW.rating,
+                                  review_count = review_count + 1,
+                                  rating = CAST(rating_sum + NEW.rating AS DOUBLE PRECISION) / (review_count + 1)
+                WHERE id = NEW.reviewee_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS review_rating_sync ON review',
+        """CREATE TRIGGER review_rating_sync
+        AFTER INSERT OR DELETE OR UPDATE OF rating, reviewee_id ON review
+        FOR EACH ROW EXECUTE FUNCTION review_rating_sync()""",
+    ],
+}
+
+for dialect, statements in RATING_TRIGGERS_DDL.items():
+    for statement in statements:
+        event.listen(Review.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+
+def recompute_ratings():
+    """Recompute every user's rating summary from the review table."""
+    reviews = select(Review.rating).where(Review.reviewee_id == User.id)
+    db.session.execute(
+        User.__table__.update().values(
+            rating_sum=coalesce(reviews.with_only_columns(func.sum(Review.rating)).scalar_subquery(), 0),
+            review_count=reviews.with_only_columns(func.count()).scalar_subquery(),
+            rating=coalesce(reviews.with_only_columns(func.avg(Review.rating)).scalar_subquery(), 0),
+        )
+    )
+    db.session.commit()
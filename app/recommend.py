@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+import numpy as np
+from flask import current_app
+from sqlalchemy import literal, select
+from . import db
+from .models import User, Job, job_skill_tags, user_skill_tags
+
+# Score weights. Skills count as the share of the job's tags the worker has,
+# the rating as stars out of five
+PROFESSION_WEIGHT = 3.0
+SKILLS_WEIGHT = 2.0
+LOCATION_WEIGHT = 1.0
+RATING_WEIGHT = 1.0
+
+# Per-row arrays of a MatchIndex, all in the order of ids
+ROW_COLUMNS = ('ids', 'owners', 'professions', 'locations', 'ratings', 'active')
+LINK_COLUMNS = ('link_rows', 'link_tags', 'link_alive')
+
+logger = logging.getLogger('app.recommend')
+
+class Codes:
+    """Small ints for professions and locations, shared by both indexes so their codes compare."""
+
+    def __init__(self):
+        self.codes = {}
+        self.lock = threading.Lock()
+
+    def of(self, values):
+        """Array of the codes of values; rows without one get -1 and match nothing."""
+        with self.lock:
+            codes = {value: self.codes.setdefault(value, len(self.codes)) if value else -1 for value in set(values)}
+        return np.array([codes[value] for value in values], np.int32)
+
+class MatchIndex:
+    """One side of the match, workers or open jobs, as NumPy columns sorted by id.
+
+    Skills are kept as parallel arrays of (row, tag) links. Changed ids are
+    marked and re-read on the next refresh: their rows are updated in place,
+    rows that no longer match the source (a job that closed or was deleted)
+    are deactivated and new ids are added. Each process also reloads
+    everything after max_age seconds, to pick up changes made by other
+    processes; that reload runs on a background thread and swaps the new
+    columns in under the lock, so requests keep using the old ones meanwhile.
+    """
+
+    def __init__(self, source, links, codes):
+        self.source = source
+        self.links = links
+        self.codes = codes
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.loaded_at = None
+        # Ids marked while a background reload runs, or None when none does
+        self.reloading = None
+
+    def mark(self, *ids):
+        with self.lock:
+            self.dirty.update(ids)
+            if self.reloading is not None:
+                self.reloading.update(ids)
+
+    def fetch(self, ids=None):
+        rows = self.source()
+        id_column = rows.selected_columns[0]
+        links = select(self.links, self.links.table.c.tag_id)
+        if ids is None:
+            links = links.where(self.links.in_(rows.with_only_columns(id_column)))
+        else:
+            rows = rows.where(id_column.in_(ids))
+            links = links.where(self.links.in_(ids))
+        # Plain Core rows; ORM result processing would dominate a full load
+        connection = db.session.connection(bind_arguments={'clause': rows})
+        return connection.execute(rows.order_by(id_column)).all(), connection.execute(links).all()
+
+    def columns(self, rows):
+        ids, owners, professions, locations, ratings = zip(*rows) if rows else ([],) * 5
+        return (np.array(ids, np.int64), np.array(owners, np.int64),
+                self.codes.of(professions), self.codes.of(locations),
+                np.array([rating or 0 for rating in ratings], np.float32))
+
+    def locate(self, ids):
+        """Positions of ids in the index, and which of them are there."""
+        positions = np.searchsorted(self.ids, ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == ids[found]
+        return positions, found
+
+    def link_columns(self, links):
+        """(row, tag) arrays of links, leaving out owners that are not in the index."""
+        owners, tags = zip(*links) if links else ([], [])
+        rows, found = self.locate(np.array(owners, np.int64))
+        return rows[found], np.array(tags, np.int64)[found]
+
+    def load(self, rows, links):
+        self.ids, self.owners, self.professions, self.locations, self.ratings = self.columns(rows)
+        self.active = np.ones(len(self.ids), bool)
+        self.link_rows, self.link_tags = self.link_columns(links)
+        self.link_alive = np.ones(len(self.link_rows), bool)
+
+    def update(self, ids, rows, links):
+        # Marked ids that are not in the index have nothing to deactivate
+        positions, found = self.locate(np.array(ids, np.int64))
+        self.active[positions[found]] = False
+        self.link_alive &= ~np.isin(self.link_rows, positions[found])
+
+        ids, owners, professions, locations, ratings = self.columns(rows)
+        positions, found = self.locate(ids)
+        for name, values in (('owners', owners), ('professions', professions),
+                             ('locations', locations), ('ratings', ratings)):
+            column = getattr(self, name)
+            column[positions[found]] = values[found]
+            setattr(self, name, np.concatenate([column, values[~found]]))
+        self.active[positions[found]] = True
+        self.active = np.concatenate([self.active, np.ones((~found).sum(), bool)])
+        last = self.ids[-1] if len(self.ids) else None
+        self.ids = np.concatenate([self.ids, ids[~found]])
+        if last is not None and (ids[~found] < last).any():
+            # A job that reopened comes back below the last id
+            self.sort()
+
+        link_rows, link_tags = self.link_columns(links)
+        self.link_rows = np.concatenate([self.link_rows, link_rows])
+        self.link_tags = np.concatenate([self.link_tags, link_tags])
+        self.link_alive = np.concatenate([self.link_alive, np.ones(len(link_rows), bool)])
+
+    def sort(self):
+        """Put the rows back in the order of ids, keeping links pointing at them."""
+        order = np.argsort(self.ids, kind='stable')
+        for name in ROW_COLUMNS:
+            setattr(self, name, getattr(self, name)[order])
+        self.link_rows = np.argsort(order)[self.link_rows]
+
+    def refresh(self, max_age):
+        with self.lock:
+            if self.loaded_at is None:
+                # Nothing to serve yet, so the first load runs here
+                self.dirty.clear()
+                self.load(*self.fetch())
+                self.loaded_at = time.monotonic()
+                return
+            if self.reloading is None and time.monotonic() - self.loaded_at > max_age:
+                self.reloading = set()
+                threading.Thread(target=self.reload, args=(current_app._get_current_object(),),
+                                 name='recommender-reload', daemon=True).start()
+            if self.dirty:
+                ids, self.dirty = sorted(self.dirty), set()
+                self.update(ids, *self.fetch(ids))
+
+    def reload(self, app):
+        """Load everything into a new index and swap its columns in.
+
+        Ids marked since the reload began may have been read before their
+        change, so they stay dirty for the next refresh.
+        """
+        fresh = None
+        try:
+            with app.app_context():
+                fresh = MatchIndex(self.source, self.links, self.codes)
+                fresh.load(*fresh.fetch())
+        except Exception:
+            logger.exception('Recommendation index reload failed, keeping the old one')
+        with self.lock:
+            if fresh is not None:
+                for name in ROW_COLUMNS + LINK_COLUMNS:
+                    setattr(self, name, getattr(fresh, name))
+                self.dirty = self.reloading
+            # A failed reload is retried after another max_age
+            self.loaded_at = time.monotonic()
+            self.reloading = None
+
+    def find(self, id):
+        """Row of an active id, or None."""
+        position = np.searchsorted(self.ids, id)
+        if position < len(self.ids) and self.ids[position] == id and self.active[position]:
+            return position
+        return None
+
+    def tags(self, row):
+        return self.link_tags[(self.link_rows == row) & self.link_alive]
+
+    def overlap(self, tags):
+        """How many of tags each row has."""
+        matches = self.link_alive & np.isin(self.link_tags, tags)
+        return np.bincount(self.link_rows[matches], minlength=len(self.ids))
+
+    def tag_counts(self):
+        return np.bincount(self.link_rows[self.link_alive], minlength=len(self.ids))
+
+def matches(column, code):
+    """Rows with the same profession or location code; a job or worker without one matches nothing."""
+    return (column == code) & (code >= 0)
+
+def top(scores, eligible, ids, limit):
+    """Ids of the best eligible rows, highest score first, newest first among equals."""
+    candidates = np.flatnonzero(eligible)
+    if not len(candidates):
+        return []
+    keys = scores[candidates].astype(np.float64) + 1e-6 * ids[candidates] / (ids[-1] + 1)
+    if len(candidates) > limit:
+        best = np.argpartition(-keys, limit - 1)[:limit]
+        candidates, keys = candidates[best], keys[best]
+    return ids[candidates[np.argsort(-keys)]].tolist()
+
+def workers_source():
+    return select(User.id, User.id.label('owner'), User.profession, User.location, User.rating)
+
+def jobs_source():
+    return select(Job.id, Job.poster_id, Job.profession, Job.location, literal(0.0)).where(Job.is_open())
+
+class Recommender:
+    def __init__(self, max_age):
+        self.max_age = max_age
+        codes = Codes()
+        self.workers = MatchIndex(workers_source, user_skill_tags.c.user_id, codes)
+        self.jobs = MatchIndex(jobs_source, job_skill_tags.c.job_id, codes)
+
+    def refresh(self):
+        self.workers.refresh(self.max_age)
+        self.jobs.refresh(self.max_age)
+
+def recommender():
+    recommender = current_app.extensions['recommender']
+    recommender.refresh()
+    return recommender
+
+def suggest_workers(job_id, limit=None):
+    """Ids of the workers who best match an open job, excluding its poster."""
+    index = recommender()
+    jobs, workers = index.jobs, index.workers
+    with jobs.lock:
+        row = jobs.find(job_id)
+        if row is None:
+            return []
+        profession, location, poster, tags = (jobs.professions[row], jobs.locations[row],
+                                              jobs.owners[row], jobs.tags(row))
+    with workers.lock:
+        overlap = workers.overlap(tags)
+        same_profession = matches(workers.professions, profession)
+        scores = (PROFESSION_WEIGHT * same_profession
+                  + SKILLS_WEIGHT * overlap / max(len(tags), 1)
+                  + LOCATION_WEIGHT * matches(workers.locations, location)
+                  + RATING_WEIGHT * workers.ratings / 5)
+        eligible = workers.active & (same_profession | (overlap > 0)) & (workers.ids != poster)
+        return top(scores, eligible, workers.ids, limit or current_app.config['RECOMMENDATIONS'])
+
+def recommend_jobs(user_id, exclude=(), limit=None):
+    """Ids of the open jobs that best match a worker, leaving out their own jobs and those in exclude."""
+    index = recommender()
+    jobs, workers = index.jobs, index.workers
+    with workers.lock:
+        row = workers.find(user_id)
+        if row is None:
+            return []
+        profession, location, tags = workers.professions[row], workers.locations[row], workers.tags(row)
+    with jobs.lock:
+        overlap = jobs.overlap(tags)
+        same_profession = matches(jobs.professions, profession)
+        scores = (PROFESSION_WEIGHT * same_profession
+                  + SKILLS_WEIGHT * overlap / np.maximum(jobs.tag_counts(), 1)
+                  + LOCATION_WEIGHT * matches(jobs.locations, location))
+        eligible = (jobs.active & (same_profession | (overlap > 0)) & (jobs.owners != user_id)
+                    & ~np.isin(jobs.ids, list(exclude)))
+        return top(scores, eligible, jobs.ids, limit or current_app.config['RECOMMENDATIONS'])
+
+def in_order(query, model, ids):
+    """The rows of model with ids, in the order of ids."""
+    if not ids:
+        return []
+    rows = {row.id: row for row in query.filter(model.id.in_(ids))}
+    return [rows[id] for id in ids if id in rows]
+
+def job_changed(*job_ids):
+    """Re-read jobs on the next recommendation; call after committing a change to them."""
+    current_app.extensions['recommender'].jobs.mark(*job_ids)
+
+def worker_changed(*user_ids):
+    """Re-read users on the next recommendation; call after committing a change to them."""
+    current_app.extensions['recommender'].workers.mark(*user_ids)
+
+def init_app(app):
+    app.config.setdefault('RECOMMENDATIONS', 5)
+    app.config.setdefault('RECOMMENDATIONS_MAX_AGE', 300)
+    app.extensions['recommender'] = Recommender(app.config['RECOMMENDATIONS_MAX_AGE'])
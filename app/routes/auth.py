@@ -1,13 +1,39 @@
 #auth.py
-from flask import Blueprint, render_template, request, flash, redirect, url_for
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
 from flask_login import login_user, login_required, logout_user, current_user
 from ..models import User
 from .. import db
 from ..forms import RegistrationForm, LoginForm
+from ..database import retry_on_busy
+from ..passwords import hash_password, check_password, needs_rehash, HashingBusy
+from ..identity import remember_user
+from ..ratelimit import check_limits
 
 auth = Blueprint('auth', __name__)
 
+def busy(template, form):
+    flash('We are handling a lot of sign-ins right now. Please try again in a moment.', category='error')
+    return render_template(template, form=form), 503
+
+def too_many_attempts(template, form, retry_after):
+    flash(f'Too many attempts. Please try again in {retry_after} seconds.', category='error')
+    return render_template(template, form=form), 429, {'Retry-After': str(retry_after)}
+
+# Only the writes of login and sign-up are retried on a busy database, so a
+# retry neither spends rate limit tokens nor queues a hash again
+
+@retry_on_busy
+def save_password(user_id, pwhash):
+    db.session.execute(db.update(User).where(User.id == user_id).values(password=pwhash))
+    db.session.commit()
+
+@retry_on_busy
+def create_user(**fields):
+    user = User(**fields)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
 @auth.route('/login', methods=['GET', 'POST'])
 def login():
     """Handle user login."""
@@ -16,9 +42,24 @@ def login():
     
     form = LoginForm()
     if form.validate_on_submit():
+        # Throttled per client and per account before any lookup or hashing
+        retry_after = check_limits('login', account=form.email.data)
+        if retry_after:
+            return too_many_attempts("auth/login.html", form, retry_after)
         user = User.query.filter_by(email=form.email.data).first()
-        if user and check_password_hash(user.password, form.password.data):
+        try:
+            valid = user and check_password(user.password, form.password.data)
+            # Upgrade hashes made with an older method or cost while the password is at hand
+            rehash = valid and needs_rehash(user.password)
+            if rehash:
+                pwhash = hash_password(form.password.data)
+        except HashingBusy:
+            return busy("auth/login.html", form)
+        if valid:
             login_user(user, remember=form.remember_me.data)
+            remember_user(user)
+            if rehash:
+                save_password(user.id, pwhash)
             flash('Logged in successfully!', category='success')
             next_page = request.args.get('next')
             return redirect(next_page or url_for('home.index'))
@@ -42,22 +83,26 @@ def sign_up():
     
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = generate_password_hash(form.password1.data, method='pbkdf2:sha256')
-        new_user = User(
-            email=form.email.data, 
-            username=form.username.data, 
-            password=hashed_password,
-            first_name=form.first_name.data,
-            last_name=form.last_name.data
-        )
-        db.session.add(new_user)
+        retry_after = check_limits('sign_up')
+        if retry_after:
+            return too_many_attempts("auth/sign_up.html", form, retry_after)
+        try:
+            hashed_password = hash_password(form.password1.data)
+        except HashingBusy:
+            return busy("auth/sign_up.html", form)
         try:
-            db.session.commit()
+            new_user = create_user(
+                email=form.email.data, 
+                username=form.username.data, 
+                password=hashed_password,
+                first_name=form.first_name.data,
+                last_name=form.last_name.data
+            )
             login_user(new_user, remember=True)
             flash('Account created successfully!', category='success')
             return redirect(url_for('profile.view_profile', user_id=new_user.id))
-        except Exception as e:
+        except Exception:
             db.session.rollback()
             flash('An error occurred. Please try again.', category='error')
-            print(f"Error during user registration: {str(e)}")
+            current_app.logger.exception('Error during user registration')
     return render_template("auth/sign_up.html", form=form)
\ No newline at end of file
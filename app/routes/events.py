@@ -0,0 +1,35 @@
+import time
+from flask import Blueprint, Response, current_app, request
+from flask_login import login_required, current_user
+from ..events import format_event
+
+events = Blueprint('events', __name__)
+
+@events.route('/stream')
+@login_required
+def stream():
+    """Server-Sent Events for the current user: applications, decisions and messages.
+
+    The generator runs after the request context is gone, so it holds no
+    database connection; everything it needs is read up front. Browsers
+    reconnect with the id of the last event they got in Last-Event-ID, and
+    the events published since are sent first.
+    """
+    heartbeat = current_app.config['EVENTS_HEARTBEAT']
+    deadline = time.monotonic() + current_app.config['EVENTS_STREAM_SECONDS']
+    last_id = request.headers.get('Last-Event-ID', '')
+    subscription = current_app.extensions['events'].subscribe(current_user.id,
+                                                              int(last_id) if last_id.isdigit() else None)
+
+    def generate():
+        try:
+            # Browsers reconnect this many milliseconds after the stream ends
+            yield 'retry: 3000\n\n'
+            while (remaining := deadline - time.monotonic()) > 0:
+                item = subscription.get(min(heartbeat, remaining))
+                yield format_event(*item) if item else ': keep-alive\n\n'
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,41 +1,41 @@
-import os
 from flask import Blueprint, render_template, flash, redirect, url_for, current_app, request, jsonify
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
-from ..forms import JobForm, DummyForm, RatingForm, AcceptApplicationForm, PROFESSIONS, MOROCCAN_CITIES, SearchJobsForm
-from ..models import Job, User, Application, Review, JobPicture, ApplicationStatus, accepted_applicants
+from ..forms import JobForm, DummyForm, RatingForm, AcceptApplicationForm, PROFESSIONS, MOROCCAN_CITIES, SearchJobsForm, SavedSearchForm
+from ..models import Job, User, Application, Review, JobPicture, ApplicationStatus, PictureStatus, accepted_applicants, job_skill_tags, SavedSearch, FeedItem
 from .. import db
 from datetime import datetime, timezone
-from PIL import Image
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only
+from ..utils import keyset_page
+from ..search import fts_query, search_jobs
+from ..images import stage_upload, process_pictures
+from ..storage import release
+from ..database import retry_on_busy
+from ..routing import read_replica
+from ..fragments import invalidate_job
+from ..recommend import suggest_workers, in_order, job_changed, worker_changed
+from ..conditional import page_etag, not_modified, with_etag
+from ..tags import tag_job, split_tags, having_tags, MAX_FILTER_TAGS
+from ..saved_searches import match_job, normalize_keywords, ANY, MAX_SAVED_SEARCHES
+from ..events import publish
 
 job = Blueprint('job', __name__)
 
+JOBS_PER_PAGE = 20
+MAX_JOBS_PER_PAGE = 100
+
+# User columns shown next to an application
+APPLICANT_COLUMNS = (User.id, User.first_name, User.last_name, User.profile_picture)
+# User columns shown for a suggested worker
+WORKER_CARD_COLUMNS = APPLICANT_COLUMNS + (User.profession, User.location, User.rating)
+
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def save_pictures(pictures):
-    """Save and resize uploaded job pictures, return filenames."""
-    picture_filenames = []
-    for picture in pictures:
-        if picture.filename:
-            filename = secure_filename(picture.filename)
-            _, ext = os.path.splitext(filename)
-            new_filename = f"{current_user.id}_{datetime.now().timestamp()}{ext}"
-            picture_path = os.path.join(current_app.config['UPLOAD_FOLDER2'], new_filename)
-            
-            # Resize image
-            output_size = (800, 600)
-            img = Image.open(picture)
-            img.thumbnail(output_size)
-            img.save(picture_path)
-            
-            picture_filenames.append(new_filename)
-    return picture_filenames
-
 @job.route('/post', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def post_job():
     form = JobForm()
     if form.validate_on_submit():
@@ -51,17 +51,26 @@ def post_job():
         )
         db.session.add(new_job)
         db.session.flush()  # This assigns an ID to new_job
-
-        # Handle picture uploads
+        tag_job(new_job.id, new_job.required_skills)
+        # Deliver it to the feeds of matching saved searches
+        match_job(new_job)
+        # SQLite may hand out the id of a deleted job again
+        invalidate_job(new_job.id)
+
+        # Handle picture uploads; resizing happens in the background
+        job_pictures = []
         if form.pictures.data:
             for picture in form.pictures.data:
                 if picture and allowed_file(picture.filename):
-                    filename = secure_filename(picture.filename)
-                    picture.save(os.path.join(current_app.config['UPLOAD_FOLDER2'], filename))
-                    job_picture = JobPicture(filename=filename, job_id=new_job.id)
+                    filename, status = stage_upload(picture)
+                    job_picture = JobPicture(filename=filename, job_id=new_job.id, status=status)
                     db.session.add(job_picture)
+                    job_pictures.append(job_picture)
 
+        job_id = new_job.id
         db.session.commit()
+        job_changed(job_id)
+        process_pictures(job_pictures)
         flash('Your job has been posted!', 'success')
         return redirect(url_for('job.view_jobs' ))
     return render_template('job/post_job.html', title='Post a Job', form=form)
@@ -69,55 +78,154 @@ def post_job():
 
 
 @job.route('/jobs', methods=['GET', 'POST'])
+@read_replica
 def view_jobs():
     form = SearchJobsForm()
     
     # Initialize variables
     location = None
     profession = None
-    results = None
+    keywords = None
+    skills = None
     
     # Handle both POST (form submission) and GET (URL parameters) requests
     if form.validate_on_submit() or request.method == 'GET':
         # Get filter parameters from form or URL
         location = form.location.data or request.args.get('location')
         profession = form.profession.data or request.args.get('profession')
-        
-        # Query jobs based on filters
-        jobs_query = Job.query.filter(Job.status == ApplicationStatus.OPEN)
-        
-        if location and location != 'All':
-            jobs_query = jobs_query.filter(Job.location == location)
-        if profession and profession != 'All':
-            jobs_query = jobs_query.filter(Job.profession == profession)
-        
-        # Sort jobs by date_posted in descending order
-        jobs_query = jobs_query.order_by(Job.date_posted.desc())
-        
-        results = jobs_query.all()
+        keywords = (form.keywords.data or request.args.get('keywords') or '').strip() or None
+        skills = (form.skills.data or request.args.get('skills') or '').strip() or None
     
-    # If no filters applied, get all open jobs sorted by date
-    if not results and location == 'All' and profession == 'All':
-        jobs = Job.query.filter(Job.status == ApplicationStatus.OPEN).order_by(Job.date_posted.desc()).all()
+    # Query jobs based on filters
+    jobs_query = Job.query.filter(Job.is_open())
+    
+    if location and location != 'All':
+        jobs_query = jobs_query.filter(Job.location == location)
+    if profession and profession != 'All':
+        jobs_query = jobs_query.filter(Job.profession == profession)
+    skill_names = split_tags(skills)[:MAX_FILTER_TAGS]
+    if skill_names:
+        # Jobs requiring every listed skill
+        jobs_query = having_tags(jobs_query, job_skill_tags.c.job_id, Job.id, skill_names)
+    
+    per_page = min(max(request.args.get('per_page', JOBS_PER_PAGE, type=int), 1), MAX_JOBS_PER_PAGE)
+    after = request.args.get('after')
+    before = request.args.get('before')
+    
+    if fts_query(keywords):
+        # Full-text search, most relevant first
+        search_query, score = search_jobs(jobs_query, keywords)
+        rows, next_cursor, prev_cursor = keyset_page(search_query, [score, Job.id], per_page,
+                                                     after=after, before=before,
+                                                     key=lambda row: [row.score, row.Job.id])
+        jobs = [row.Job for row in rows]
     else:
-        jobs = results
+        # Keyset pagination on (date_posted, id), newest first
+        jobs, next_cursor, prev_cursor = keyset_page(jobs_query, [Job.date_posted, Job.id], per_page,
+                                                     after=after, before=before)
+    
+    # The page is fully determined by the jobs on it and the URL
+    etag = page_etag(jobs, next_cursor, prev_cursor)
+    response = not_modified(etag)
+    if response:
+        return response
     
     # Pre-fill form with current filter values
     form.location.data = location
     form.profession.data = profession
+    form.keywords.data = keywords
+    form.skills.data = skills
     
-    return render_template('job/view_jobs.html',
-                           jobs=jobs,
-                           results=results,
-                           ApplicationStatus=ApplicationStatus,
-                           form=form,
-                           cities=MOROCCAN_CITIES,
-                           professions=PROFESSIONS)
-
+    return with_etag(render_template('job/view_jobs.html',
+                                     jobs=jobs,
+                                     results=jobs,
+                                     next_cursor=next_cursor,
+                                     prev_cursor=prev_cursor,
+                                     per_page=per_page,
+                                     keywords=keywords,
+                                     skills=skills,
+                                     location=location,
+                                     profession=profession,
+                                     ApplicationStatus=ApplicationStatus,
+                                     form=form,
+                                     cities=MOROCCAN_CITIES,
+                                     professions=PROFESSIONS), etag)
+
+
+
+@job.route('/feed', methods=['GET'])
+@login_required
+@read_replica
+def feed():
+    """Open jobs that matched the user's saved searches, most recently matched first."""
+    per_page = min(max(request.args.get('per_page', JOBS_PER_PAGE, type=int), 1), MAX_JOBS_PER_PAGE)
+    feed_query = (db.session.query(Job, FeedItem.id)
+                  .join(FeedItem, FeedItem.job_id == Job.id)
+                  .filter(FeedItem.user_id == current_user.id, Job.is_open()))
+    rows, next_cursor, prev_cursor = keyset_page(feed_query, [FeedItem.id], per_page,
+                                                 after=request.args.get('after'),
+                                                 before=request.args.get('before'),
+                                                 key=lambda row: [row.id])
+    jobs = [row.Job for row in rows]
+    searches = SavedSearch.query.filter_by(user_id=current_user.id).order_by(SavedSearch.id).all()
+    
+    etag = page_etag(jobs, next_cursor, prev_cursor, searches)
+    response = not_modified(etag)
+    if response:
+        return response
+    
+    # 'Save this search' on view_jobs passes its filters along
+    form = SavedSearchForm(location=request.args.get('location') or ANY,
+                           profession=request.args.get('profession') or ANY,
+                           keywords=request.args.get('keywords'))
+    return with_etag(render_template('job/feed.html',
+                                     jobs=jobs,
+                                     searches=searches,
+                                     next_cursor=next_cursor,
+                                     prev_cursor=prev_cursor,
+                                     per_page=per_page,
+                                     form=form,
+                                     delete_form=DummyForm(),
+                                     ApplicationStatus=ApplicationStatus), etag)
+
+@job.route('/saved-searches', methods=['POST'])
+@login_required
+@retry_on_busy
+def save_search():
+    form = SavedSearchForm()
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            flash(errors[0], 'danger')
+    elif SavedSearch.query.filter_by(user_id=current_user.id).count() >= MAX_SAVED_SEARCHES:
+        flash(f'You can keep up to {MAX_SAVED_SEARCHES} saved searches. Delete one first.', 'warning')
+    else:
+        search = SavedSearch(user_id=current_user.id,
+                             location=form.location.data or ANY,
+                             profession=form.profession.data or ANY,
+                             keywords=normalize_keywords(form.keywords.data),
+                             min_budget=form.min_budget.data,
+                             max_budget=form.max_budget.data)
+        db.session.add(search)
+        db.session.commit()
+        flash('Search saved. New jobs that match it will show up in your feed.', 'success')
+    return redirect(url_for('job.feed'))
 
+@job.route('/saved-searches/<int:search_id>/delete', methods=['POST'])
+@login_required
+@retry_on_busy
+def delete_saved_search(search_id):
+    search = SavedSearch.query.get_or_404(search_id)
+    if search.user_id != current_user.id:
+        flash('You do not have permission to delete this search', 'danger')
+    elif DummyForm().validate_on_submit():
+        db.session.delete(search)
+        db.session.commit()
+        flash('Saved search deleted.', 'success')
+    return redirect(url_for('job.feed'))
 
 @job.route('/delete-job/<int:job_id>', methods=['POST'])
 @login_required
+@retry_on_busy
 def delete_job(job_id):
     job = Job.query.get_or_404(job_id)
     if job.poster_id != current_user.id:
@@ -131,9 +239,21 @@ def delete_job(job_id):
         # Delete associated applications
         Application.query.filter_by(job_id=job_id).delete()
         
+        # Take it out of feeds
+        FeedItem.query.filter_by(job_id=job_id).delete()
+        
+        # Unlink its skill tags
+        db.session.execute(job_skill_tags.delete().where(job_skill_tags.c.job_id == job_id))
+        
+        # Drop the job's references to its stored pictures
+        for picture in job.pictures:
+            release(picture.filename)
+        
         # Delete the job
         db.session.delete(job)
         db.session.commit()
+        invalidate_job(job_id)
+        job_changed(job_id)
         flash('Job deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -144,6 +264,7 @@ def delete_job(job_id):
 
 @job.route('/apply-job/<int:job_id>', methods=['POST'])
 @login_required
+@retry_on_busy
 def apply_job(job_id):
     job = Job.query.get_or_404(job_id)
     if job.status != ApplicationStatus.OPEN:
@@ -156,12 +277,16 @@ def apply_job(job_id):
     else:
         new_application = Application(job_id=job_id, worker_id=current_user.id, date_applied=datetime.now(timezone.utc))
         db.session.add(new_application)
+        poster_id, title = job.poster_id, job.title
         db.session.commit()
+        invalidate_job(job_id)
+        publish(poster_id, 'application', job_id=job_id, title=title)
         flash('Successfully applied for the job!', 'success')
     return redirect(url_for('job.view_jobs'))
 
 @job.route('/finish-job/<int:job_id>', methods=['POST'])
 @login_required
+@retry_on_busy
 def finish_job(job_id):
     job = Job.query.get_or_404(job_id)
 
@@ -174,13 +299,21 @@ def finish_job(job_id):
         return redirect(url_for('job.job_details', job_id=job_id))
 
     job.status = ApplicationStatus.COMPLETED
+    workers = db.session.scalars(db.select(Application.worker_id)
+                                 .filter_by(job_id=job_id, status=ApplicationStatus.ACCEPTED)).all()
+    title = job.title
     db.session.commit()
+    invalidate_job(job_id)
+    job_changed(job_id)
+    for worker_id in workers:
+        publish(worker_id, 'job_finished', job_id=job_id, title=title)
     flash('Job marked as finished. Please rate the workers.', 'success')
     return redirect(url_for('job.rate_job', job_id=job_id))
 
 
 @job.route('/rate-job/<int:job_id>', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def rate_job(job_id):
     job = Job.query.get_or_404(job_id)
     if job.status != ApplicationStatus.COMPLETED:
@@ -204,7 +337,10 @@ def rate_job(job_id):
             comment=form.comment.data
         )
         db.session.add(new_review)
+        worker_id = accepted_application.worker_id
         db.session.commit()
+        # The review changed the worker's rating
+        worker_changed(worker_id)
         flash('Rating submitted successfully!', 'success')
         return redirect(url_for('job.view_jobs'))
     
@@ -213,17 +349,35 @@ def rate_job(job_id):
 
 @job.route('/job_details/<int:job_id>', methods=['GET'])
 @login_required
+@read_replica
 def job_details(job_id):
     try:
-        job = Job.query.get_or_404(job_id)
-        applications = Application.query.filter_by(job_id=job_id).order_by(Application.date_applied.desc()).all()
+        # Pictures are only loaded when the cached details fragment has to be rendered again
+        job = Job.query.options(joinedload(Job.poster).load_only(User.id, User.first_name, User.last_name)).get_or_404(job_id)
+        applied = (db.session.query(Application.id)
+                   .filter_by(job_id=job_id, worker_id=current_user.id).first() is not None)
+        
+        # The poster of an open job gets workers to invite
+        suggested_workers = []
+        if job.poster_id == current_user.id and job.status == ApplicationStatus.OPEN:
+            suggested_workers = in_order(User.query.options(load_only(*WORKER_CARD_COLUMNS)),
+                                         User, suggest_workers(job.id))
+        
+        # Job.version covers the job and its pictures
+        etag = page_etag(job, applied, suggested_workers)
+        response = not_modified(etag)
+        if response:
+            return response
+        
         form = AcceptApplicationForm()
         
-        return render_template('job/job_details.html',
-                               job=job,
-                               applications=applications,
-                               form=form,
-                               ApplicationStatus=ApplicationStatus)
+        return with_etag(render_template('job/job_details.html',
+                                         job=job,
+                                         applied=applied,
+                                         suggested_workers=suggested_workers,
+                                         form=form,
+                                         ApplicationStatus=ApplicationStatus,
+                                         PictureStatus=PictureStatus), etag)
     except Exception as e:
         current_app.logger.error(f"Error in job_details: {str(e)}")
         return "An error occurred while loading job details.", 500
@@ -233,6 +387,7 @@ def job_details(job_id):
 
 @job.route('/accept-application/<int:job_id>/<int:application_id>', methods=['POST'])
 @login_required
+@retry_on_busy
 def accept_application(job_id, application_id):
     job = Job.query.get_or_404(job_id)
     application = Application.query.get_or_404(application_id)
@@ -249,15 +404,39 @@ def accept_application(job_id, application_id):
         flash('This application has already been accepted.', 'info')
         return redirect(url_for('profile.view_profile', user_id=current_user.id))
 
-    application.status = ApplicationStatus.ACCEPTED
-    job.status = ApplicationStatus.IN_PROGRESS
-
-    # Reject all other applications for this job
-    for other_application in job.applications:
-        if other_application.id != application.id:
-            other_application.status = ApplicationStatus.REJECTED
+    accepted, title = application.worker_id, job.title
+    # Take the job only if it is still open and unchanged since it was read.
+    # A racing accept, or an edit, makes this match no row, so at most one
+    # application per job is ever accepted.
+    taken = db.session.execute(db.update(Job)
+                               .where(Job.id == job_id,
+                                      Job.status == ApplicationStatus.OPEN,
+                                      Job.version == job.version)
+                               .values(status=ApplicationStatus.IN_PROGRESS, version=Job.version + 1)
+                               .execution_options(synchronize_session=False)).rowcount
+    if not taken:
+        db.session.rollback()
+        flash('This job is no longer open or was changed meanwhile. Please check it again.', 'warning')
+        return redirect(url_for('job.job_details', job_id=job_id))
 
+    db.session.execute(db.update(Application)
+                       .where(Application.id == application_id)
+                       .values(status=ApplicationStatus.ACCEPTED)
+                       .execution_options(synchronize_session=False))
+    # Reject all other applications for this job in one statement
+    rejected = db.session.scalars(db.update(Application)
+                                  .where(Application.job_id == job_id,
+                                         Application.id != application_id,
+                                         Application.status != ApplicationStatus.REJECTED)
+                                  .values(status=ApplicationStatus.REJECTED)
+                                  .returning(Application.worker_id)
+                                  .execution_options(synchronize_session=False)).all()
     db.session.commit()
+    invalidate_job(job_id)
+    job_changed(job_id)
+    publish(accepted, 'decision', job_id=job_id, title=title, status='accepted')
+    for worker_id in rejected:
+        publish(worker_id, 'decision', job_id=job_id, title=title, status='rejected')
 
     flash('Application accepted successfully!', 'success')
     return redirect(url_for('profile.view_profile', user_id=current_user.id))
@@ -267,6 +446,7 @@ def accept_application(job_id, application_id):
 
 @job.route('/reject-application/<int:job_id>/<int:application_id>', methods=['POST'])
 @login_required
+@retry_on_busy
 def reject_application(job_id, application_id):
     job = Job.query.get_or_404(job_id)
     application = Application.query.get_or_404(application_id)
@@ -280,7 +460,10 @@ def reject_application(job_id, application_id):
         return redirect(url_for('job.job_details', job_id=job_id))
 
     application.status = ApplicationStatus.REJECTED
+    worker_id, title = application.worker_id, job.title
     db.session.commit()
+    invalidate_job(job_id)
+    publish(worker_id, 'decision', job_id=job_id, title=title, status='rejected')
 
     flash('Application has been rejected.', 'success')
     return redirect(url_for('job.job_details', job_id=job_id))
\ No newline at end of file
@@ -0,0 +1,16 @@
+import os
+from flask import Blueprint, abort, current_app, send_from_directory
+from ..storage import is_stored
+
+media = Blueprint('media', __name__)
+
+# Stored files never change under a given name, so browsers may cache them forever
+ONE_YEAR = 365 * 24 * 60 * 60
+
+@media.route('/<name>')
+def serve(name):
+    if not is_stored(name):
+        abort(404)
+    response = send_from_directory(os.path.join(current_app.config['MEDIA_FOLDER'], name[:2]), name, max_age=ONE_YEAR)
+    response.headers['Cache-Control'] = f'public, max-age={ONE_YEAR}, immutable'
+    return response
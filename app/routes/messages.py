@@ -0,0 +1,91 @@
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask_login import login_required, current_user
+from ..forms import MessageForm
+from ..models import Message, User
+from .. import db
+from ..utils import keyset_page
+from ..database import retry_on_busy
+from ..routing import read_replica
+from ..conditional import page_etag, not_modified, with_etag
+from ..messaging import conversations, thread, mark_read, forget_unread, PARTNER_COLUMNS
+from ..events import publish
+from sqlalchemy.orm import load_only
+
+messages = Blueprint('messages', __name__)
+
+CONVERSATIONS_PER_PAGE = 20
+MESSAGES_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+def per_page(default):
+    return min(max(request.args.get('per_page', default, type=int), 1), MAX_PER_PAGE)
+
+@messages.route('/')
+@login_required
+@read_replica
+def inbox():
+    """Conversations of the current user, the most recently active first."""
+    rows, next_cursor, prev_cursor = keyset_page(conversations(current_user.id), [Message.id],
+                                                 per_page(CONVERSATIONS_PER_PAGE),
+                                                 after=request.args.get('after'),
+                                                 before=request.args.get('before'),
+                                                 key=lambda row: [row.Message.id])
+    
+    etag = page_etag(rows, next_cursor, prev_cursor)
+    response = not_modified(etag)
+    if response:
+        return response
+    
+    return with_etag(render_template('messages/inbox.html',
+                                     conversations=rows,
+                                     next_cursor=next_cursor,
+                                     prev_cursor=prev_cursor), etag)
+
+@messages.route('/<int:user_id>', methods=['GET'])
+@login_required
+@retry_on_busy
+def view_thread(user_id):
+    """Messages with another user, a page at a time; opening the newest page marks it read."""
+    partner = User.query.options(load_only(*PARTNER_COLUMNS)).get_or_404(user_id)
+    after = request.args.get('after')
+    before = request.args.get('before')
+    page, next_cursor, prev_cursor = keyset_page(thread(current_user.id, user_id), [Message.id],
+                                                 per_page(MESSAGES_PER_PAGE), after=after, before=before)
+    
+    # One UPDATE marks everything up to the newest message shown as read
+    marked = page and not after and not before and mark_read(current_user.id, user_id, page[0].id)
+    if marked:
+        # The navbar badge is counted again, inside this transaction
+        forget_unread(current_user.id)
+    
+    # Pages are newest first; show each one oldest first, like a chat
+    html = render_template('messages/thread.html',
+                           partner=partner,
+                           messages=list(reversed(page)),
+                           next_cursor=next_cursor,
+                           prev_cursor=prev_cursor,
+                           form=MessageForm())
+    
+    # Committed after rendering, as committing expires the messages shown
+    if marked:
+        db.session.commit()
+    return html
+
+@messages.route('/<int:user_id>', methods=['POST'])
+@login_required
+@retry_on_busy
+def send_message(user_id):
+    if user_id == current_user.id:
+        flash('You cannot send a message to yourself.', 'danger')
+        return redirect(url_for('messages.inbox'))
+    receiver = User.query.options(load_only(User.id)).get_or_404(user_id)
+    form = MessageForm()
+    if form.validate_on_submit():
+        db.session.add(Message(sender_id=current_user.id, receiver_id=receiver.id, content=form.content.data))
+        sender_id, sender = current_user.id, current_user.first_name or current_user.username
+        db.session.commit()
+        forget_unread(user_id)
+        publish(user_id, 'message', sender_id=sender_id, sender=sender)
+    else:
+        flash('Your message could not be sent. Please try again.', 'danger')
+    return redirect(url_for('messages.view_thread', user_id=user_id))
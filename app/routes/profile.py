@@ -1,3 +1,4 @@
+import io
 import os
 from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
 from flask_login import login_required, current_user
@@ -5,7 +6,16 @@ from werkzeug.utils import secure_filename
 from ..forms import UpdateProfileForm, AddSkillForm, AddExperienceForm, DummyForm
 from ..models import User, Skill, Experience, Job, Review, Application, ApplicationStatus
 from .. import db
-from sqlalchemy.sql import func
+from ..storage import store, release, is_stored
+from ..database import retry_on_busy
+from ..routing import read_replica
+from ..conditional import page_etag, not_modified, with_etag
+from ..tags import tag_user
+from ..recommend import recommend_jobs, in_order, worker_changed
+from ..identity import fresh_user, forget_user
+from ..fragments import invalidate_poster
+from .job import APPLICANT_COLUMNS
+from sqlalchemy.orm import joinedload, selectinload, load_only
 from PIL import Image
 
 
@@ -13,7 +23,7 @@ from PIL import Image
 profile = Blueprint('profile', __name__)
 
 def save_picture(file):
-    """Save and resize uploaded profile picture, return filename."""
+    """Resize uploaded profile picture, store it by content and return its name."""
     # Secure the filename
     filename = secure_filename(file.filename)
     
@@ -23,100 +33,141 @@ def save_picture(file):
         return None
 
     # Ensure the file size is within acceptable limits
-    if file.content_length > current_app.config['MAX_CONTENT_LENGTH']:
+    max_size = current_app.config.get('MAX_CONTENT_LENGTH')
+    if max_size and file.content_length > max_size:
         flash('File too large. Please upload a smaller image.', 'error')
         return None
 
-    # Define the new filename with user ID and the original extension
     _, ext = os.path.splitext(filename)
-    new_filename = f"{current_user.id}{ext}"
-    
-    # Define the upload folder and create it if it doesn't exist
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Define the full file path
-    filepath = os.path.join(upload_folder, new_filename)
+    ext = ext.lower()
     
     try:
         # Resize the image to 250x250 pixels
         output_size = (250, 250)
         img = Image.open(file)
         img.thumbnail(output_size)
-        img.save(filepath)
+        buffer = io.BytesIO()
+        img.save(buffer, format=Image.registered_extensions()[ext])
     except Exception as e:
         flash('An error occurred while processing the image.', 'error')
         return None
     
-    return new_filename
+    # Identical pictures are stored once, under a name derived from their content
+    return store(buffer.getvalue(), ext)
 
 @profile.route('/profile/<int:user_id>')
 @login_required
+@read_replica
 def view_profile(user_id):
     """View user profile."""
     # Query the user by ID, or return a 404 error if not found
-    profile_user = User.query.get_or_404(user_id)
+    profile_user = User.query.options(selectinload(User.skills),
+                                      selectinload(User.experiences),
+                                      selectinload(User.certifications)).get_or_404(user_id)
     
-    # Calculate the average rating from reviews
-    average_rating = db.session.query(func.avg(Review.rating)).filter_by(reviewee_id=user_id).scalar() or 0
+    # Average rating is kept up to date on the user row
+    average_rating = profile_user.rating
     
     # Get the list of applied jobs, posted jobs, and reviews
     if current_user.id == profile_user.id:    
-        posted_jobs = Job.query.filter_by(poster_id=current_user.id).order_by(Job.date_posted.desc()).all()
-        applied_jobs = Application.query.filter_by(worker_id=current_user.id).order_by(Application.date_applied.desc()).all()
+        posted_jobs = (Job.query.filter_by(poster_id=current_user.id)
+                       .options(selectinload(Job.applications)
+                                .joinedload(Application.applicant)
+                                .load_only(*APPLICANT_COLUMNS))
+                       .order_by(Job.date_posted.desc())
+                       .all())
+        applied_jobs = (Application.query.filter_by(worker_id=current_user.id)
+                        .options(joinedload(Application.job)
+                                 .load_only(Job.id, Job.title, Job.description, Job.status))
+                        .order_by(Application.date_applied.desc())
+                        .all())
+        # Open jobs matching the user's profession, location and skills
+        recommended_jobs = in_order(Job.query.options(load_only(Job.id, Job.title, Job.location,
+                                                                Job.budget, Job.date_posted)),
+                                    Job, recommend_jobs(current_user.id,
+                                                        exclude=[a.job_id for a in applied_jobs]))
     else:
         applied_jobs = []
         posted_jobs = []
+        recommended_jobs = []
+    
+    reviews = (Review.query.filter_by(reviewee_id=user_id)
+               .options(joinedload(Review.reviewer).load_only(User.id, User.username),
+                        joinedload(Review.job).load_only(Job.id, Job.title))
+               .all())
     
-    reviews = Review.query.filter_by(reviewee_id=user_id).all()
+    # Everything the page shows. On their own profile the user comes from the
+    # identity map, where the eager loads above do not apply, so the
+    # collections are named to make sure they are loaded
+    etag = page_etag(profile_user, profile_user.skills, profile_user.experiences, profile_user.certifications,
+                     posted_jobs, applied_jobs, reviews, recommended_jobs)
+    response = not_modified(etag)
+    if response:
+        return response
     
     # Render the profile template with the necessary data
-    return render_template('profile/profile.html', 
-                           profile_user=profile_user, 
-                           average_rating=average_rating,
-                           add_skill_form=AddSkillForm(),
-                           add_experience_form=AddExperienceForm(),
-                           form=DummyForm(), 
-                           applied_jobs=applied_jobs,
-                           posted_jobs=posted_jobs,
-                           reviews=reviews,
-                           ApplicationStatus=ApplicationStatus)
+    return with_etag(render_template('profile/profile.html', 
+                                     profile_user=profile_user, 
+                                     average_rating=average_rating,
+                                     add_skill_form=AddSkillForm(),
+                                     add_experience_form=AddExperienceForm(),
+                                     form=DummyForm(), 
+                                     applied_jobs=applied_jobs,
+                                     posted_jobs=posted_jobs,
+                                     recommended_jobs=recommended_jobs,
+                                     reviews=reviews,
+                                     ApplicationStatus=ApplicationStatus), etag)
 
 @profile.route('/update-profile', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def update_profile():
     """Update user profile."""
     form = UpdateProfileForm()
+    user = fresh_user()
     if form.validate_on_submit():
-        # Update the current user's profile information with form data
-        current_user.first_name = form.first_name.data
-        current_user.last_name = form.last_name.data
-        current_user.email = form.email.data
-        current_user.location = form.location.data
-        current_user.profession = form.profession.data
-        current_user.date_of_birth = form.date_of_birth.data
-        current_user.about_me = form.about_me.data
+        # Job details show the poster's name
+        renamed = (user.first_name, user.last_name) != (form.first_name.data, form.last_name.data)
+        # Update the user's profile information with form data
+        user.first_name = form.first_name.data
+        user.last_name = form.last_name.data
+        user.email = form.email.data
+        user.location = form.location.data
+        user.profession = form.profession.data
+        user.date_of_birth = form.date_of_birth.data
+        user.about_me = form.about_me.data
         
         # Update the profile picture if provided
         if form.profile_picture.data:
-            if current_user.profile_picture:
-                # Delete the old profile picture
-                old_filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], current_user.profile_picture)
-                if os.path.exists(old_filepath):
-                    os.remove(old_filepath)
-            current_user.profile_picture = save_picture(form.profile_picture.data)
+            new_picture = save_picture(form.profile_picture.data)
+            if new_picture and user.profile_picture:
+                if is_stored(user.profile_picture):
+                    release(user.profile_picture)
+                else:
+                    # Delete the old profile picture
+                    old_filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], user.profile_picture)
+                    if os.path.exists(old_filepath):
+                        os.remove(old_filepath)
+            if new_picture:
+                user.profile_picture = new_picture
         
         # Commit the changes to the database
+        user_id = user.id
         db.session.commit()
+        forget_user(user_id)
+        worker_changed(user_id)
+        if renamed:
+            invalidate_poster(user_id)
         flash('Your profile has been updated!', 'success')
-        return redirect(url_for('profile.view_profile', user_id=current_user.id))
+        return redirect(url_for('profile.view_profile', user_id=user_id))
     
     # Pre-populate the form with the current user's data
-    form.process(obj=current_user)
+    form.process(obj=user)
     return render_template('profile/update_profile.html', form=form)
 
 @profile.route('/add-skill', methods=['POST'])
 @login_required
+@retry_on_busy
 def add_skill():
     """Add a new skill to user profile."""
     form = AddSkillForm()
@@ -128,13 +179,17 @@ def add_skill():
             # Add the new skill to the database
             skill = Skill(name=form.skill.data, user_id=current_user.id)
             db.session.add(skill)
+            tag_user(current_user.id, skill.name)
+            user_id = current_user.id
             db.session.commit()
+            worker_changed(user_id)
             return jsonify(success=True, message='Skill added successfully!')
     else:
         return jsonify(success=False, message='Failed to add skill. Please try again.')
 
 @profile.route('/add-experience', methods=['POST'])
 @login_required
+@retry_on_busy
 def add_experience():
     """Add a new experience to user profile."""
     form = AddExperienceForm()
@@ -1,19 +1,72 @@
 from flask import render_template, request, Blueprint
 from flask_login import login_required
-from ..models import User
-from ..forms import SearchWorkersForm
+from sqlalchemy.orm import load_only
+from ..models import User, user_skill_tags
+from ..forms import SearchWorkersForm, WORKER_SORTS
+from ..routing import read_replica
+from ..utils import keyset_page
+from ..tags import split_tags, having_tags, MAX_FILTER_TAGS
 
 worker = Blueprint('worker', __name__)
 
+WORKERS_PER_PAGE = 20
+MAX_WORKERS_PER_PAGE = 100
+
+# Keyset sort keys, each ending in the primary key; ids grow with sign-up time
+SORTS = {
+    'rating': [User.rating, User.id],
+    'reviews': [User.review_count, User.id],
+    'recent': [User.id],
+}
+
+# What a worker card in search_workers.html shows
+WORKER_COLUMNS = (User.id, User.first_name, User.last_name, User.profile_picture, User.location,
+                  User.profession, User.rating, User.review_count, User.created_at)
+
+def with_skills(query, skills):
+    """Keep the workers that have every one of skills (tag names)."""
+    return having_tags(query, user_skill_tags.c.user_id, User.id, skills)
+
 @worker.route('/search', methods=['GET', 'POST'])
 @login_required
+@read_replica
 def search_workers():
     form = SearchWorkersForm()
     results = []
+    next_cursor = prev_cursor = None
+    location = profession = skills = sort = None
 
-    if form.validate_on_submit():
+    # Searches come from the form, or from the URL for sorting and paging links
+    if request.method == 'GET':
+        location = request.args.get('location')
+        profession = request.args.get('profession')
+        skills = request.args.get('skills')
+        sort = request.args.get('sort')
+    elif form.validate_on_submit():
         location = form.location.data
         profession = form.profession.data
-        results = User.query.filter_by(location=location, profession=profession).all()
+        skills = form.skills.data
+        sort = form.sort.data
+    sort = sort if sort in SORTS else 'rating'
+    per_page = min(max(request.args.get('per_page', WORKERS_PER_PAGE, type=int), 1), MAX_WORKERS_PER_PAGE)
+
+    if location and profession:
+        query = (User.query.filter_by(location=location, profession=profession)
+                 .options(load_only(*WORKER_COLUMNS)))
+        skill_names = split_tags(skills)[:MAX_FILTER_TAGS]
+        if skill_names:
+            query = with_skills(query, skill_names)
+        results, next_cursor, prev_cursor = keyset_page(query, SORTS[sort], per_page,
+                                                        after=request.args.get('after'),
+                                                        before=request.args.get('before'))
+
+    # Pre-fill form with the current search
+    form.location.data = location
+    form.profession.data = profession
+    form.skills.data = skills
+    form.sort.data = sort
 
-    return render_template('worker/search_workers.html', form=form, results=results)
\ No newline at end of file
+    return render_template('worker/search_workers.html', form=form, results=results,
+                           location=location, profession=profession, skills=skills, sort=sort,
+                           sort_label=dict(WORKER_SORTS)[sort], per_page=per_page,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
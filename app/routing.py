@@ -0,0 +1,57 @@
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA = 'replica'
+
+def read_replica(view):
+    """Let the SELECTs of a read-only view go to the replica, when one is configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+def pinned_to_primary():
+    """True for a while after this client wrote, so it reads its own writes
+    even if the replica lags behind."""
+    return session.get('primary_until', 0) > time.time()
+
+class RoutingSession(Session):
+    """Session that sends reads in read_replica views to the replica engine.
+
+    Flushes, INSERT/UPDATE/DELETE statements and raw SQL always use the
+    primary, and once this session has written, so do all its reads.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.reads_from_replica(clause):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def reads_from_replica(self, clause):
+        return (isinstance(clause, Select)
+                and not self._flushing
+                and not self.info.get('wrote')
+                and REPLICA in self._db.engines
+                and has_request_context()
+                and g.get('read_replica', False)
+                and not pinned_to_primary())
+
+@event.listens_for(RoutingSession, 'after_flush')
+def flushed(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def committed(db_session):
+    if db_session.info.get('wrote') and has_request_context() and REPLICA in db_session._db.engines:
+        session['primary_until'] = time.time() + current_app.config['REPLICA_PIN_SECONDS']
@@ -0,0 +1,38 @@
+from sqlalchemy import func, literal, or_, select
+from . import db
+from .models import SavedSearch, FeedItem
+from .tags import dialect_insert
+
+# Location or profession of a saved search that matches any value
+ANY = 'All'
+# Saved searches per user, which bounds the work done for each new job
+MAX_SAVED_SEARCHES = 20
+
+def normalize_keywords(keywords):
+    """Case-folded keywords with whitespace collapsed, or None when blank."""
+    return ' '.join((keywords or '').split()).casefold() or None
+
+def match_job(job):
+    """Add a newly posted job to the feed of every user with a saved search it matches.
+
+    One INSERT ... SELECT, part of the current transaction. The candidate
+    searches are looked up by the job's location and profession, each or
+    'All', on ix_saved_search_location_profession, so a post only
+    touches the searches for its city and trade. Budget bounds and the
+    keyword phrase are checked on those candidates alone. The phrase is
+    found with instr() or strpos(), not LIKE, so % and _ in it are plain
+    characters.
+    """
+    position = func.strpos if db.session.get_bind().dialect.name == 'postgresql' else func.instr
+    text = ' '.join(filter(None, (job.title, job.description, job.required_skills))).casefold()
+    matches = (select(SavedSearch.user_id, literal(job.id))
+               .where(SavedSearch.location.in_([job.location, ANY]),
+                      SavedSearch.profession.in_([job.profession, ANY]),
+                      SavedSearch.user_id != job.poster_id,
+                      or_(SavedSearch.min_budget.is_(None), SavedSearch.min_budget <= job.budget),
+                      or_(SavedSearch.max_budget.is_(None), SavedSearch.max_budget >= job.budget),
+                      or_(SavedSearch.keywords.is_(None), position(literal(text), SavedSearch.keywords) > 0))
+               .distinct())
+    db.session.execute(dialect_insert()(FeedItem)
+                       .from_select(['user_id', 'job_id'], matches)
+                       .on_conflict_do_nothing())
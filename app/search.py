@@ -0,0 +1,81 @@
+import re
+from sqlalchemy import DDL, Index, event, func, literal_column, table, column, text
+from . import db
+from .models import Job
+
+# External-content FTS5 index over the searchable job columns, kept in sync by triggers
+JOB_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        title, description, required_skills,
+        content='job', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, description, required_skills ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        INSERT INTO job_fts(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END""",
+]
+
+for statement in JOB_FTS_DDL:
+    event.listen(Job.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Job.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS job_fts').execute_if(dialect='sqlite'))
+
+job_fts = table('job_fts', column('rowid'))
+
+# bm25 column weights for title, description and required_skills
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+SKILLS_WEIGHT = 5.0
+
+# PostgreSQL has no FTS5; a weighted tsvector over the same columns, behind a
+# GIN expression index, plays its part there
+TEXT_SEARCH_CONFIG = 'english'
+
+def weighted(column, weight):
+    return func.setweight(func.to_tsvector(text(f"'{TEXT_SEARCH_CONFIG}'::regconfig"), func.coalesce(column, '')),
+                          text(f"'{weight}'"))
+
+job_columns = Job.__table__.c
+job_document = (weighted(job_columns.title, 'A')
+                .op('||')(weighted(job_columns.required_skills, 'B'))
+                .op('||')(weighted(job_columns.description, 'C')))
+
+JOB_SEARCH_INDEX = Index('ix_job_search', job_document, postgresql_using='gin').ddl_if(dialect='postgresql')
+
+def fts_query(keywords):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r'\w+', keywords or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def tsquery(keywords):
+    """The PostgreSQL to_tsquery equivalent of fts_query."""
+    terms = re.findall(r'\w+', keywords or '')
+    return ' & '.join(f'{term}:*' for term in terms)
+
+def search_jobs(query, keywords):
+    """Restrict a Job query to full-text matches of keywords.
+
+    Returns the query, now yielding (Job, score) rows, and the score column
+    (higher is more relevant) to order and paginate on.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        matches = func.to_tsquery(text(f"'{TEXT_SEARCH_CONFIG}'::regconfig"), tsquery(keywords))
+        score = func.ts_rank(job_document, matches, type_=db.Float).label('score')
+        return query.filter(job_document.op('@@')(matches)).add_columns(score), score
+
+    fts_table = literal_column('job_fts')
+    score = (-func.bm25(fts_table, TITLE_WEIGHT, DESCRIPTION_WEIGHT, SKILLS_WEIGHT, type_=db.Float)).label('score')
+    query = (query.join(job_fts, job_fts.c.rowid == Job.id)
+                  .filter(fts_table.op('MATCH')(fts_query(keywords)))
+                  .add_columns(score))
+    return query, score
@@ -0,0 +1,61 @@
+// Live notifications from /events/stream, shown as alerts above the page content on
+// the pages that include the live-notifications container
+function showNotification(text, url) {
+    const alert = document.createElement('div');
+    alert.className = 'alert alert-info alert-dismissable fade show';
+    alert.setAttribute('role', 'alert');
+    const link = document.createElement('a');
+    link.href = url;
+    link.textContent = text;
+    const close = document.createElement('button');
+    close.type = 'button';
+    close.className = 'close';
+    close.setAttribute('data-dismiss', 'alert');
+    close.setAttribute('aria-label', 'Close');
+    close.innerHTML = '<span aria-hidden="true">&times;</span>';
+    alert.append(link, close);
+    document.getElementById('live-notifications').prepend(alert);
+}
+
+function bumpUnreadBadge() {
+    const link = document.getElementById('messages-link');
+    let badge = link.querySelector('.badge');
+    if (!badge) {
+        badge = document.createElement('span');
+        badge.className = 'badge badge-danger';
+        badge.textContent = '0';
+        link.append(' ', badge);
+    }
+    badge.textContent = parseInt(badge.textContent, 10) + 1;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.EventSource || !document.getElementById('live-notifications')) {
+        return;
+    }
+    const events = new EventSource('/events/stream');
+
+    events.addEventListener('application', function(event) {
+        const data = JSON.parse(event.data);
+        showNotification(`New application for "${data.title}"`, `/job/job_details/${data.job_id}`);
+    });
+
+    events.addEventListener('decision', function(event) {
+        const data = JSON.parse(event.data);
+        showNotification(`Your application for "${data.title}" was ${data.status}`, '/job/jobs');
+    });
+
+    events.addEventListener('job_finished', function(event) {
+        const data = JSON.parse(event.data);
+        showNotification(`"${data.title}" was marked as finished`, '/job/jobs');
+    });
+
+    events.addEventListener('message', function(event) {
+        const data = JSON.parse(event.data);
+        // Already on the thread with the sender; it is read on the next load
+        if (window.location.pathname !== `/messages/${data.sender_id}`) {
+            bumpUnreadBadge();
+            showNotification(`New message from ${data.sender}`, `/messages/${data.sender_id}`);
+        }
+    });
+});
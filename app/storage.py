@@ -0,0 +1,79 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from flask import current_app, url_for
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db
+from .models import StoredFile
+
+# Content-addressed names: sha256 hex digest, an optional variant suffix and an extension
+STORED_NAME = re.compile(r'^([0-9a-f]{64})(_[a-z]+)?(\.[a-z0-9]+)$')
+
+def is_stored(name):
+    """True if name refers to a content-addressed file rather than a legacy static file."""
+    return bool(name and STORED_NAME.match(name))
+
+def file_path(name):
+    """Path of a stored file; files are sharded by the first two digest characters."""
+    return os.path.join(current_app.config['MEDIA_FOLDER'], name[:2], name)
+
+def media_url(name, legacy_folder):
+    """URL of a stored file, or of a legacy file under static/<legacy_folder>."""
+    if is_stored(name):
+        return url_for('media.serve', name=name)
+    return url_for('static', filename=f'{legacy_folder}/{name}')
+
+def write_file(path, data):
+    """Write data to path atomically, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def store(data, ext):
+    """Store bytes under their sha256 digest and take a reference to them.
+
+    Identical content is kept once on disk. Returns the stored name. The
+    reference is part of the current transaction.
+    """
+    name = f'{hashlib.sha256(data).hexdigest()}{ext.lower()}'
+    insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    db.session.execute(insert(StoredFile)
+                       .values(name=name, size=len(data), ref_count=1)
+                       .on_conflict_do_update(index_elements=[StoredFile.name],
+                                              set_={'ref_count': StoredFile.ref_count + 1}))
+    path = file_path(name)
+    if not os.path.exists(path):
+        write_file(path, data)
+    return name
+
+def release(name):
+    """Drop a reference to a stored file; unreferenced files are removed by prune()."""
+    if is_stored(name):
+        db.session.execute(db.update(StoredFile)
+                           .where(StoredFile.name == name)
+                           .values(ref_count=StoredFile.ref_count - 1))
+
+def prune():
+    """Delete stored files, and their variants, that nothing references any more.
+
+    Only rows still unreferenced when deleted have their files removed, and
+    the files go before the commit: a store() of the same content waits on
+    the deleted row, then finds the file missing and writes it again.
+    """
+    names = db.session.execute(db.delete(StoredFile)
+                               .where(StoredFile.ref_count <= 0)
+                               .returning(StoredFile.name)).scalars().all()
+    for name in names:
+        digest = STORED_NAME.match(name).group(1)
+        for path in glob.glob(os.path.join(current_app.config['MEDIA_FOLDER'], digest[:2], f'{digest}*')):
+            os.remove(path)
+    db.session.commit()
+    return len(names)
+
+def init_app(app):
+    app.config.setdefault('MEDIA_FOLDER', os.path.join(app.instance_path, 'media'))
+    app.jinja_env.globals['media_url'] = media_url
@@ -0,0 +1,72 @@
+from sqlalchemy import exists, false, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db
+from .models import SkillTag, job_skill_tags, user_skill_tags
+
+MAX_TAG_LENGTH = 50
+# Most tags a search may filter on
+MAX_FILTER_TAGS = 5
+
+def normalize(name):
+    """Case-folded tag name with whitespace collapsed; '' for a blank name."""
+    return ' '.join((name or '').split()).casefold()[:MAX_TAG_LENGTH]
+
+def split_tags(text):
+    """Distinct tag names from a comma separated list such as Job.required_skills, in order."""
+    return list(dict.fromkeys(name for name in map(normalize, (text or '').split(',')) if name))
+
+def dialect_insert():
+    return postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+
+def add_tags(names):
+    """Create the tags in names that do not exist yet."""
+    if names:
+        db.session.execute(dialect_insert()(SkillTag).values([{'name': name} for name in names])
+                           .on_conflict_do_nothing(index_elements=['name']))
+
+def tag_ids(names):
+    """Map the normalized names that have a tag to its id."""
+    if not names:
+        return {}
+    return dict(db.session.execute(select(SkillTag.name, SkillTag.id).where(SkillTag.name.in_(names))).all())
+
+def link_tags(owner_column, owner_id, names):
+    """Link an owner (job or user) to tags by name, creating them as needed.
+
+    owner_column is job_skill_tags.c.job_id or user_skill_tags.c.user_id.
+    Links that already exist are left alone. Two statements, part of the
+    current transaction: add the missing tags, then link them all by name.
+    """
+    if not names:
+        return
+    add_tags(names)
+    tags = select(literal(owner_id), SkillTag.id).where(SkillTag.name.in_(names))
+    db.session.execute(dialect_insert()(owner_column.table)
+                       .from_select([owner_column.key, 'tag_id'], tags)
+                       .on_conflict_do_nothing())
+
+def tag_job(job_id, required_skills):
+    link_tags(job_skill_tags.c.job_id, job_id, split_tags(required_skills))
+
+def tag_user(user_id, skill_name):
+    link_tags(user_skill_tags.c.user_id, user_id, split_tags(skill_name))
+
+def having_tags(query, owner_column, owner_key, names):
+    """Keep the rows of query whose owner is linked to every tag in names.
+
+    Each tag is an EXISTS lookup on the association primary key, so the
+    database can walk query in its sort order and stop once a page is full.
+    owner_key is the column the association refers to, such as User.id.
+    """
+    ids = tag_ids(names)
+    if len(ids) < len(names):
+        # An unknown tag matches nothing
+        return query.filter(false())
+    return having_tag_ids(query, owner_column, owner_key, ids.values())
+
+def having_tag_ids(query, owner_column, owner_key, ids):
+    """having_tags for tags already looked up by id."""
+    tag_column = owner_column.table.c.tag_id
+    for tag_id in ids:
+        query = query.filter(exists().where(owner_column == owner_key, tag_column == tag_id))
+    return query
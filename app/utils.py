@@ -1,4 +1,7 @@
+import base64
+import json
 from datetime import datetime
+from sqlalchemy import tuple_
 
 def timeago(date):
     now = datetime.utcnow()
@@ -22,4 +25,60 @@ def timeago(date):
     elif minutes > 0:
         return f"{int(minutes)} minute{'s' if int(minutes) != 1 else ''} ago"
     else:
-        return "Just now"
\ No newline at end of file
+        return "Just now"
+
+def encode_cursor(values):
+    """Encode the sort key of a row into an opaque, URL-safe cursor."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor produced by encode_cursor, or return None if it is invalid."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(columns):
+            return None
+        return tuple(
+            datetime.fromisoformat(value) if column.type.python_type is datetime else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        )
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+def keyset_page(query, columns, per_page, after=None, before=None, key=None):
+    """Return one page of query, sorted descending on columns, using keyset pagination.
+
+    The last column must be unique (usually the primary key) so that the sort
+    key totally orders the rows. key extracts the sort values from a result
+    row and defaults to reading the columns as attributes.
+    Returns (items, next_cursor, prev_cursor).
+    """
+    sort_key = tuple_(*columns)
+    before = decode_cursor(before, columns)
+    after = None if before else decode_cursor(after, columns)
+
+    if before:
+        query = query.filter(sort_key > before).order_by(*[column.asc() for column in columns])
+    else:
+        if after:
+            query = query.filter(sort_key < after)
+        query = query.order_by(*[column.desc() for column in columns])
+
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if before:
+        items.reverse()
+
+    if key is None:
+        key = lambda item: [getattr(item, column.key) for column in columns]
+
+    def cursor_for(item):
+        return encode_cursor(key(item))
+
+    next_cursor = cursor_for(items[-1]) if items and (has_more or before) else None
+    prev_cursor = cursor_for(items[0]) if items and ((has_more and before) or after) else None
+    return items, next_cursor, prev_cursor
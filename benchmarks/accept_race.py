@@ -0,0 +1,99 @@
+"""Stress accept_application with racing accepts and check every job ends with exactly one accepted worker.
+
+Each worker process stands in for a gunicorn worker. For every job, all of
+them accept a different application at the same moment, and only one may
+win. Exits with status 1 if any job ends up with another outcome.
+
+    python benchmarks/accept_race.py --workers 8 --jobs 50
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User, Job, Application, ApplicationStatus
+
+PASSWORD = 'password123'
+HASH_METHOD = 'pbkdf2:sha256:1000'
+
+def make_app(path):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'WTF_CSRF_ENABLED': False,
+                       'IMAGE_WORKERS': 0, 'PASSWORD_HASH_METHOD': HASH_METHOD})
+
+def seed(app, workers, jobs):
+    """A poster with jobs, each applied to by one worker per racing process; return {job id: [application ids]}."""
+    with app.app_context():
+        password = generate_password_hash(PASSWORD, method=HASH_METHOD)
+        poster = User(email='poster@example.com', username='poster', password=password)
+        applicants = [User(email=f'worker{i}@example.com', username=f'worker{i}', password=password)
+                      for i in range(workers)]
+        db.session.add_all([poster, *applicants])
+        db.session.flush()
+        applications = {}
+        for n in range(jobs):
+            job = Job(title=f'Job {n}', description='Racing accepts for this job.', profession='Plumber',
+                      location='Rabat', budget=100, poster_id=poster.id)
+            db.session.add(job)
+            db.session.flush()
+            rows = [Application(job_id=job.id, worker_id=applicant.id) for applicant in applicants]
+            db.session.add_all(rows)
+            db.session.flush()
+            applications[job.id] = [row.id for row in rows]
+        db.session.commit()
+        return applications
+
+def racer(path, index, applications, barrier, results):
+    app = make_app(path)
+    client = app.test_client()
+    client.post('/auth/login', data={'email': 'poster@example.com', 'password': PASSWORD})
+    won = errors = 0
+    for job_id, application_ids in applications.items():
+        barrier.wait()
+        response = client.post(f'/job/accept-application/{job_id}/{application_ids[index]}')
+        if response.status_code != 302:
+            errors += 1
+        elif '/job/job_details/' not in response.location:
+            won += 1
+    results.put((won, errors))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--jobs', type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'race.db')
+    app = make_app(path)
+    applications = seed(app, args.workers, args.jobs)
+
+    barrier = multiprocessing.Barrier(args.workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=racer, args=(path, i, applications, barrier, results))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    won, errors = [sum(values) for values in zip(*[results.get() for _ in processes])]
+    for process in processes:
+        process.join()
+
+    with app.app_context():
+        bad = 0
+        for job_id in applications:
+            statuses = [status for status, in db.session.query(Application.status).filter_by(job_id=job_id)]
+            accepted = statuses.count(ApplicationStatus.ACCEPTED)
+            rejected = statuses.count(ApplicationStatus.REJECTED)
+            job_status = db.session.get(Job, job_id).status
+            if accepted != 1 or rejected != len(statuses) - 1 or job_status != ApplicationStatus.IN_PROGRESS:
+                bad += 1
+                print(f'job {job_id}: {accepted} accepted, {rejected} rejected, job {job_status.value}')
+
+    print(f'{args.workers} racing workers, {args.jobs} jobs: {won} accepts won, {errors} errors, {bad} jobs inconsistent')
+    sys.exit(1 if bad or errors or won != args.jobs else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Measure login throughput, and how a login burst slows other pages, with and without the hashing pool.
+
+Client threads log in over and over while one more thread keeps loading
+the job list. Each run uses a different PASSWORD_HASH_WORKERS; 0 hashes
+on the request thread as before.
+
+    python benchmarks/login_throughput.py --clients 16 --seconds 5 --pool-sizes 0 2 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.datagen import generate
+from app.models import User
+
+PASSWORD = 'password'
+
+def make_app(path, method, pool_size):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'WTF_CSRF_ENABLED': False,
+                       'IMAGE_WORKERS': 0, 'PASSWORD_HASH_METHOD': method,
+                       'PASSWORD_HASH_WORKERS': pool_size, 'PASSWORD_HASH_QUEUE_SIZE': 1000,
+                       # Every client shares one address; this measures hashing, not throttling
+                       'RATELIMIT_ENABLED': False})
+
+def run(path, method, pool_size, clients, seconds, emails):
+    app = make_app(path, method, pool_size)
+    deadline = time.perf_counter() + seconds
+    logins, busy, page_times = [0] * clients, [0] * clients, []
+
+    def log_in(i):
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            response = client.post('/auth/login', data={'email': emails[i % len(emails)], 'password': PASSWORD})
+            if response.status_code == 302:
+                logins[i] += 1
+                client.get('/auth/logout')
+            elif response.status_code == 503:
+                busy[i] += 1
+
+    def browse():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.get('/job/jobs')
+            page_times.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=log_in, args=(i,)) for i in range(clients)] + [threading.Thread(target=browse)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    p95 = statistics.quantiles(page_times, n=20)[-1] if len(page_times) > 1 else float('nan')
+    print(f'{pool_size:>6} {sum(logins) / seconds:>10.1f} {sum(busy):>6} '
+          f'{statistics.median(page_times) * 1000:>10.1f} {p95 * 1000:>10.1f}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--method', default='pbkdf2:sha256')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[0, 2, os.cpu_count()])
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = make_app(path, args.method, 0)
+    with app.app_context():
+        generate(users=200, jobs=1000, progress=lambda message: None)
+        # Hashed with the benchmarked method, so logins never rehash
+        User.query.update({'password': generate_password_hash(PASSWORD, method=args.method)})
+        db.session.commit()
+        emails = [email for email, in db.session.query(User.email).limit(args.clients)]
+
+    print(f'{args.clients} clients logging in for {args.seconds:g}s with {args.method}, {os.cpu_count()} CPUs')
+    print(f"{'pool':>6} {'logins/s':>10} {'503s':>6} {'jobs p50ms':>10} {'jobs p95ms':>10}")
+    for pool_size in args.pool_sizes:
+        run(path, args.method, pool_size, args.clients, args.seconds, emails)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Compare job board throughput under concurrent readers and writers, with and without SQLite tuning.
+
+Each worker process stands in for a gunicorn worker: it mostly lists open
+jobs and sometimes applies to one, committing each write on its own.
+
+    python benchmarks/sqlite_concurrency.py --workers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.database import is_busy
+from app.datagen import generate
+from app.models import Job, Application
+
+# SQLite as configured before: rollback journal, full sync, the driver's default 5s lock timeout
+UNTUNED = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': None,
+           'mmap_size': None, 'cache_size': None, 'temp_store': None}
+
+def make_app(path, pragmas):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'SQLITE_PRAGMAS': pragmas,
+                       'IMAGE_WORKERS': 0})
+
+def worker(path, pragmas, seconds, write_ratio, seed, results):
+    app = make_app(path, pragmas)
+    rng = random.Random(seed)
+    reads = writes = errors = 0
+    with app.app_context():
+        job_count = Job.query.count()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                if rng.random() < write_ratio:
+                    db.session.add(Application(job_id=rng.randint(1, job_count), worker_id=rng.randint(1, 1000)))
+                    db.session.commit()
+                    writes += 1
+                else:
+                    Job.query.filter(Job.is_open()).order_by(Job.date_posted.desc(), Job.id.desc()).limit(20).all()
+                    db.session.commit()
+                    reads += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_busy(e):
+                    raise
+                errors += 1
+    results.put((reads, writes, errors))
+
+def run(label, pragmas, workers, seconds, write_ratio):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = make_app(path, pragmas)
+    with app.app_context():
+        generate(users=1000, jobs=5000, progress=lambda message: None)
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(path, pragmas, seconds, write_ratio, i, results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    totals = [sum(values) for values in zip(*[results.get() for _ in processes])]
+    for process in processes:
+        process.join()
+
+    reads, writes, errors = totals
+    print(f'{label:<8} {reads / seconds:>10.0f} {writes / seconds:>10.0f} {errors:>8}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.seconds:g}s, {args.write_ratio:.0%} writes')
+    print(f"{'':<8} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+    run('untuned', UNTUNED, args.workers, args.seconds, args.write_ratio)
+    run('tuned', {}, args.workers, args.seconds, args.write_ratio)
+
+if __name__ == '__main__':
+    main()
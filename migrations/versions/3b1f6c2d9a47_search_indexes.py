@@ -0,0 +1,60 @@
+"""search indexes
+
+Revision ID: 3b1f6c2d9a47
+Revises: f2ee375a19f9
+Create Date: 2026-10-18 10:12:03.114522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6c2d9a47'
+down_revision = 'f2ee375a19f9'
+branch_labels = None
+depends_on = None
+
+
+OPEN_JOBS = sa.text("status = 'OPEN'")
+
+
+def upgrade():
+    # create_app() may already have created these through db.create_all()
+
+    # Job listing: only OPEN jobs are listed, newest first
+    op.create_index('ix_job_open_date_posted', 'job', ['date_posted', 'id'],
+                    sqlite_where=OPEN_JOBS, postgresql_where=OPEN_JOBS,
+                    if_not_exists=True)
+    op.create_index('ix_job_open_location_date_posted', 'job', ['location', 'date_posted', 'id'],
+                    sqlite_where=OPEN_JOBS, postgresql_where=OPEN_JOBS,
+                    if_not_exists=True)
+    op.create_index('ix_job_open_profession_date_posted', 'job', ['profession', 'date_posted', 'id'],
+                    sqlite_where=OPEN_JOBS, postgresql_where=OPEN_JOBS,
+                    if_not_exists=True)
+    op.create_index('ix_job_open_location_profession_date_posted', 'job', ['location', 'profession', 'date_posted', 'id'],
+                    sqlite_where=OPEN_JOBS, postgresql_where=OPEN_JOBS,
+                    if_not_exists=True)
+    op.create_index('ix_job_poster_id_date_posted', 'job', ['poster_id', 'date_posted'], if_not_exists=True)
+
+    # Worker search
+    op.create_index('ix_user_location_profession', 'user', ['location', 'profession'], if_not_exists=True)
+
+    # Applications and reviews lookups
+    op.create_index('ix_application_job_id_worker_id', 'application', ['job_id', 'worker_id'], if_not_exists=True)
+    op.create_index('ix_application_worker_id_date_applied', 'application', ['worker_id', 'date_applied'], if_not_exists=True)
+    op.create_index('ix_review_job_id', 'review', ['job_id'], if_not_exists=True)
+    op.create_index('ix_review_reviewee_id_rating', 'review', ['reviewee_id', 'rating'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_review_reviewee_id_rating', table_name='review')
+    op.drop_index('ix_review_job_id', table_name='review')
+    op.drop_index('ix_application_worker_id_date_applied', table_name='application')
+    op.drop_index('ix_application_job_id_worker_id', table_name='application')
+    op.drop_index('ix_user_location_profession', table_name='user')
+    op.drop_index('ix_job_poster_id_date_posted', table_name='job')
+    op.drop_index('ix_job_open_location_profession_date_posted', table_name='job')
+    op.drop_index('ix_job_open_profession_date_posted', table_name='job')
+    op.drop_index('ix_job_open_location_date_posted', table_name='job')
+    op.drop_index('ix_job_open_date_posted', table_name='job')
@@ -0,0 +1,32 @@
+"""message indexes
+
+Revision ID: 3c7f1a9d5e60
+Revises: d6b8f2a41c93
+Create Date: 2026-10-18 23:41:17.305284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7f1a9d5e60'
+down_revision = 'd6b8f2a41c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created these through db.create_all()
+    op.create_index('ix_message_sender_id_receiver_id_id', 'message',
+                    ['sender_id', 'receiver_id', 'id'], if_not_exists=True)
+    op.create_index('ix_message_receiver_id_sender_id_id', 'message',
+                    ['receiver_id', 'sender_id', 'id'], if_not_exists=True)
+    op.create_index('ix_message_receiver_id_is_read_sender_id', 'message',
+                    ['receiver_id', 'is_read', 'sender_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_message_receiver_id_is_read_sender_id', table_name='message')
+    op.drop_index('ix_message_receiver_id_sender_id_id', table_name='message')
+    op.drop_index('ix_message_sender_id_receiver_id_id', table_name='message')
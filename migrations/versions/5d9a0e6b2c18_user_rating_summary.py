@@ -0,0 +1,117 @@
+"""user rating summary
+
+Revision ID: 5d9a0e6b2c18
+Revises: 8c4e2a7f1d03
+Create Date: 2026-10-18 13:05:51.872640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a0e6b2c18'
+down_revision = '8c4e2a7f1d03'
+branch_labels = None
+depends_on = None
+
+# The triggers of app/ratings.py as of this revision, kept here so later edits there do not change it
+RATING_TRIGGERS_DDL = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS review_rating_ai AFTER INSERT ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum + new.rating,
+                              review_count = review_count + 1,
+                              rating = CAST(rating_sum + new.rating AS REAL) / (review_count + 1)
+            WHERE id = new.reviewee_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS review_rating_ad AFTER DELETE ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum - old.rating,
+                              review_count = review_count - 1,
+                              rating = CASE WHEN review_count > 1
+                                            THEN CAST(rating_sum - old.rating AS REAL) / (review_count - 1)
+                                            ELSE 0 END
+            WHERE id = old.reviewee_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS review_rating_au AFTER UPDATE OF rating, reviewee_id ON review BEGIN
+            UPDATE "user" SET rating_sum = rating_sum - old.rating,
+                              review_count = review_count - 1,
+                              rating = CASE WHEN review_count > 1
+                                            THEN CAST(rating_sum - old.rating AS REAL) / (review_count - 1)
+                                            ELSE 0 END
+            WHERE id = old.reviewee_id;
+            UPDATE "user" SET rating_sum = rating_sum + new.rating,
+                              review_count = review_count + 1,
+                              rating = CAST(rating_sum + new.rating AS REAL) / (review_count + 1)
+            WHERE id = new.reviewee_id;
+        END""",
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION review_rating_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "user" SET rating_sum = rating_sum - OLD.rating,
+                                  review_count = review_count - 1,
+                                  rating = CASE WHEN review_count > 1
+                                                THEN CAST(rating_sum - OLD.rating AS DOUBLE PRECISION) / (review_count - 1)
+                                                ELSE 0 END
+                WHERE id = OLD.reviewee_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE "user" SET rating_sum = rating_sum + NEW.rating,
+                                  review_count = review_count + 1,
+                                  rating = CAST(rating_sum + NEW.rating AS DOUBLE PRECISION) / (review_count + 1)
+                WHERE id = NEW.reviewee_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""",
+        'DROP TRIGGER IF EXISTS review_rating_sync ON review',
+        """CREATE TRIGGER review_rating_sync
+        AFTER INSERT OR DELETE OR UPDATE OF rating, reviewee_id ON review
+        FOR EACH ROW EXECUTE FUNCTION review_rating_sync()""",
+    ],
+}
+
+
+def upgrade():
+    # create_app() may already have added the columns through db.create_all()
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')}
+    for column in (sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+                   sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+                   sa.Column('rating', sa.Float(), server_default='0', nullable=False)):
+        if column.name not in existing:
+            op.add_column('user', column)
+
+    op.drop_index('ix_user_location_profession', table_name='user', if_exists=True)
+    op.create_index('ix_user_location_profession_rating', 'user', ['location', 'profession', 'rating'],
+                    if_not_exists=True)
+
+    for statement in RATING_TRIGGERS_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+    # Backfill from the existing reviews
+    op.execute('''
+        UPDATE "user" SET
+            rating_sum = COALESCE((SELECT SUM(rating) FROM review WHERE reviewee_id = "user".id), 0),
+            review_count = (SELECT COUNT(*) FROM review WHERE reviewee_id = "user".id),
+            rating = COALESCE((SELECT AVG(rating) FROM review WHERE reviewee_id = "user".id), 0)
+    ''')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS review_rating_au')
+        op.execute('DROP TRIGGER IF EXISTS review_rating_ad')
+        op.execute('DROP TRIGGER IF EXISTS review_rating_ai')
+    elif dialect == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS review_rating_sync ON review')
+        op.execute('DROP FUNCTION IF EXISTS review_rating_sync()')
+
+    op.drop_index('ix_user_location_profession_rating', table_name='user')
+    op.create_index('ix_user_location_profession', 'user', ['location', 'profession'])
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('rating')
+        batch_op.drop_column('review_count')
+        batch_op.drop_column('rating_sum')
@@ -0,0 +1,30 @@
+"""worker search indexes
+
+Revision ID: 7b2d5e9f8a14
+Revises: e4b19d7c3f52
+Create Date: 2026-10-18 19:54:37.120683
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2d5e9f8a14'
+down_revision = 'e4b19d7c3f52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created these through db.create_all()
+    op.create_index('ix_user_location_profession_review_count', 'user',
+                    ['location', 'profession', 'review_count', 'id'], if_not_exists=True)
+    op.create_index('ix_user_location_profession_id', 'user', ['location', 'profession', 'id'], if_not_exists=True)
+    op.create_index('ix_skill_lower_name_user_id', 'skill', [sa.text('lower(name)'), 'user_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_skill_lower_name_user_id', table_name='skill')
+    op.drop_index('ix_user_location_profession_id', table_name='user')
+    op.drop_index('ix_user_location_profession_review_count', table_name='user')
@@ -0,0 +1,70 @@
+"""job full text search
+
+Revision ID: 8c4e2a7f1d03
+Revises: 3b1f6c2d9a47
+Create Date: 2026-10-18 11:40:27.508311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2a7f1d03'
+down_revision = '3b1f6c2d9a47'
+branch_labels = None
+depends_on = None
+
+# As app/search.py defined them at this revision
+JOB_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        title, description, required_skills,
+        content='job', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ai AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_ad AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_fts_au AFTER UPDATE OF title, description, required_skills ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.description, old.required_skills);
+        INSERT INTO job_fts(rowid, title, description, required_skills)
+        VALUES (new.id, new.title, new.description, new.required_skills);
+    END""",
+]
+
+# The weighted tsvector of app/search.py; the expression must match the one queries use
+JOB_SEARCH_INDEX_DDL = """CREATE INDEX IF NOT EXISTS ix_job_search ON job USING gin ((
+    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+    || setweight(to_tsvector('english'::regconfig, coalesce(required_skills, '')), 'B')
+    || setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+))"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(JOB_SEARCH_INDEX_DDL)
+    if bind.dialect.name != 'sqlite':
+        return
+    for statement in JOB_FTS_DDL:
+        op.execute(statement)
+    # Index the jobs that already exist
+    op.execute("INSERT INTO job_fts(job_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_job_search')
+    if bind.dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS job_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS job_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS job_fts_ai')
+    op.execute('DROP TABLE IF EXISTS job_fts')
@@ -0,0 +1,34 @@
+"""longer password hashes
+
+Revision ID: 8f4d2b6e1a39
+Revises: 3c7f1a9d5e60
+Create Date: 2026-10-19 00:37:52.914406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4d2b6e1a39'
+down_revision = '3c7f1a9d5e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt hashes are 162 characters. SQLite ignores VARCHAR lengths, so
+    # only servers that enforce them need the column widened.
+    if op.get_bind().dialect.name == 'sqlite':
+        return
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=150),
+                              type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        return
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=255),
+                              type_=sa.String(length=150), existing_nullable=False)
@@ -0,0 +1,102 @@
+"""skill tags
+
+Revision ID: 9e3a6f1c4b27
+Revises: 7b2d5e9f8a14
+Create Date: 2026-10-18 21:12:05.481930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3a6f1c4b27'
+down_revision = '7b2d5e9f8a14'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+MAX_TAG_LENGTH = 50
+
+skill_tag = sa.table('skill_tag', sa.column('id', sa.Integer), sa.column('name', sa.String))
+job_skill_tags = sa.table('job_skill_tags', sa.column('job_id', sa.Integer), sa.column('tag_id', sa.Integer))
+user_skill_tags = sa.table('user_skill_tags', sa.column('user_id', sa.Integer), sa.column('tag_id', sa.Integer))
+
+
+# split_tags() of app/tags.py at this revision
+def normalize(name):
+    return ' '.join((name or '').split()).casefold()[:MAX_TAG_LENGTH]
+
+
+def split_tags(text):
+    return list(dict.fromkeys(name for name in map(normalize, (text or '').split(',')) if name))
+
+
+def insert(table):
+    return (postgresql.insert if op.get_bind().dialect.name == 'postgresql' else sqlite.insert)(table)
+
+
+def backfill(connection, rows, links, owner_key):
+    """Link (owner id, comma separated skills) rows to their tags, a batch at a time."""
+    tags = dict(connection.execute(sa.select(skill_tag.c.name, skill_tag.c.id)).all())
+    batch = []
+    for owner_id, text in rows:
+        for name in split_tags(text):
+            if name not in tags:
+                connection.execute(insert(skill_tag).values(name=name).on_conflict_do_nothing())
+                tags[name] = connection.execute(sa.select(skill_tag.c.id).where(skill_tag.c.name == name)).scalar()
+            batch.append({owner_key: owner_id, 'tag_id': tags[name]})
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert(links).on_conflict_do_nothing(), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(links).on_conflict_do_nothing(), batch)
+
+
+def upgrade():
+    connection = op.get_bind()
+    inspector = sa.inspect(connection)
+    # create_app() may already have created these through db.create_all()
+    if not inspector.has_table('skill_tag'):
+        op.create_table('skill_tag',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+    if not inspector.has_table('job_skill_tags'):
+        op.create_table('job_skill_tags',
+            sa.Column('job_id', sa.Integer(), nullable=False),
+            sa.Column('tag_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['job_id'], ['job.id'], ),
+            sa.ForeignKeyConstraint(['tag_id'], ['skill_tag.id'], ),
+            sa.PrimaryKeyConstraint('job_id', 'tag_id')
+        )
+    if not inspector.has_table('user_skill_tags'):
+        op.create_table('user_skill_tags',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('tag_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['tag_id'], ['skill_tag.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('user_id', 'tag_id')
+        )
+    op.create_index('ix_job_skill_tags_tag_id_job_id', 'job_skill_tags', ['tag_id', 'job_id'], if_not_exists=True)
+    op.create_index('ix_user_skill_tags_tag_id_user_id', 'user_skill_tags', ['tag_id', 'user_id'], if_not_exists=True)
+    # Skill search now goes through the tags
+    op.drop_index('ix_skill_lower_name_user_id', table_name='skill', if_exists=True)
+
+    # Backfill from the existing free-text columns
+    jobs = connection.execute(sa.text('SELECT id, required_skills FROM job WHERE required_skills IS NOT NULL'))
+    backfill(connection, jobs.all(), job_skill_tags, 'job_id')
+    skills = connection.execute(sa.text('SELECT user_id, name FROM skill'))
+    backfill(connection, skills.all(), user_skill_tags, 'user_id')
+
+
+def downgrade():
+    op.create_index('ix_skill_lower_name_user_id', 'skill', [sa.text('lower(name)'), 'user_id'], if_not_exists=True)
+    op.drop_index('ix_user_skill_tags_tag_id_user_id', table_name='user_skill_tags')
+    op.drop_index('ix_job_skill_tags_tag_id_job_id', table_name='job_skill_tags')
+    op.drop_table('user_skill_tags')
+    op.drop_table('job_skill_tags')
+    op.drop_table('skill_tag')
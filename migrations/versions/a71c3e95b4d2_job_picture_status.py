@@ -0,0 +1,32 @@
+"""job picture status
+
+Revision ID: a71c3e95b4d2
+Revises: 5d9a0e6b2c18
+Create Date: 2026-10-18 15:22:40.631907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71c3e95b4d2'
+down_revision = '5d9a0e6b2c18'
+branch_labels = None
+depends_on = None
+
+picture_status = sa.Enum('PROCESSING', 'READY', 'FAILED', name='picturestatus')
+
+
+def upgrade():
+    bind = op.get_bind()
+    picture_status.create(bind, checkfirst=True)
+    # create_app() may already have added the column through db.create_all()
+    if 'status' not in {column['name'] for column in sa.inspect(bind).get_columns('job_picture')}:
+        op.add_column('job_picture', sa.Column('status', picture_status, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job_picture', schema=None) as batch_op:
+        batch_op.drop_column('status')
+    picture_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""job date_posted microseconds
+
+Revision ID: b5e0c7d3f218
+Revises: 8f4d2b6e1a39
+Create Date: 2026-10-19 10:14:08.526113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e0c7d3f218'
+down_revision = '8f4d2b6e1a39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows posted through CURRENT_TIMESTAMP were stored without fractional
+    # seconds, which SQLite orders and compares as shorter strings than the
+    # keyset cursors bound by SQLAlchemy. Servers with real timestamps are fine.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("UPDATE job SET date_posted = date_posted || '.000000' WHERE length(date_posted) = 19")
+
+
+def downgrade():
+    # The padded values are the same instants; nothing to undo
+    pass
@@ -0,0 +1,31 @@
+"""foreign key indexes
+
+Revision ID: c2a8e4f19b05
+Revises: b5e0c7d3f218
+Create Date: 2026-10-19 11:02:41.730254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a8e4f19b05'
+down_revision = 'b5e0c7d3f218'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created these through db.create_all()
+    op.create_index('ix_skill_user_id', 'skill', ['user_id'], if_not_exists=True)
+    op.create_index('ix_experience_user_id', 'experience', ['user_id'], if_not_exists=True)
+    op.create_index('ix_certification_user_id', 'certification', ['user_id'], if_not_exists=True)
+    op.create_index('ix_job_picture_job_id', 'job_picture', ['job_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_job_picture_job_id', table_name='job_picture')
+    op.drop_index('ix_certification_user_id', table_name='certification')
+    op.drop_index('ix_experience_user_id', table_name='experience')
+    op.drop_index('ix_skill_user_id', table_name='skill')
@@ -0,0 +1,33 @@
+"""stored files
+
+Revision ID: c2f84d1e6a90
+Revises: a71c3e95b4d2
+Create Date: 2026-10-18 16:48:12.290455
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f84d1e6a90'
+down_revision = 'a71c3e95b4d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created it through db.create_all()
+    if sa.inspect(op.get_bind()).has_table('stored_file'):
+        return
+    op.create_table('stored_file',
+        sa.Column('name', sa.String(length=80), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('stored_file')
@@ -0,0 +1,58 @@
+"""saved searches
+
+Revision ID: d6b8f2a41c93
+Revises: 9e3a6f1c4b27
+Create Date: 2026-10-18 22:03:41.652817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6b8f2a41c93'
+down_revision = '9e3a6f1c4b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # create_app() may already have created these through db.create_all()
+    if not inspector.has_table('saved_search'):
+        op.create_table('saved_search',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('location', sa.String(length=100), nullable=False),
+            sa.Column('profession', sa.String(length=50), nullable=False),
+            sa.Column('keywords', sa.String(length=100), nullable=True),
+            sa.Column('min_budget', sa.Float(), nullable=True),
+            sa.Column('max_budget', sa.Float(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if not inspector.has_table('feed_item'):
+        op.create_table('feed_item',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('job_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['job_id'], ['job.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'job_id', name='uq_feed_item_user_id_job_id')
+        )
+    op.create_index('ix_saved_search_location_profession', 'saved_search', ['location', 'profession'], if_not_exists=True)
+    op.create_index('ix_saved_search_user_id', 'saved_search', ['user_id'], if_not_exists=True)
+    op.create_index('ix_feed_item_user_id_id', 'feed_item', ['user_id', 'id'], if_not_exists=True)
+    op.create_index('ix_feed_item_job_id', 'feed_item', ['job_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_feed_item_job_id', table_name='feed_item')
+    op.drop_index('ix_feed_item_user_id_id', table_name='feed_item')
+    op.drop_index('ix_saved_search_user_id', table_name='saved_search')
+    op.drop_index('ix_saved_search_location_profession', table_name='saved_search')
+    op.drop_table('feed_item')
+    op.drop_table('saved_search')
@@ -0,0 +1,27 @@
+"""job version
+
+Revision ID: e4b19d7c3f52
+Revises: c2f84d1e6a90
+Create Date: 2026-10-18 18:31:09.447215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b19d7c3f52'
+down_revision = 'c2f84d1e6a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have added the column through db.create_all()
+    if 'version' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('job')}:
+        op.add_column('job', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -16,8 +16,15 @@ branch_labels = None
 depends_on = None
 
 
+def has_rating(bind):
+    return 'rating' in {column['name'] for column in sa.inspect(bind).get_columns('job')}
+
+
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
+    # A database created by db.create_all() (e.g. a new PostgreSQL one) never had the column
+    if not has_rating(op.get_bind()):
+        return
     with op.batch_alter_table('job', schema=None) as batch_op:
         batch_op.drop_column('rating')
 
@@ -26,6 +33,8 @@ def upgrade():
 
 def downgrade():
     # ### commands auto generated by Alembic - please adjust! ###
+    if has_rating(op.get_bind()):
+        return
     with op.batch_alter_table('job', schema=None) as batch_op:
         batch_op.add_column(sa.Column('rating', sa.FLOAT(), nullable=True))
 
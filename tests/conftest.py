@@ -0,0 +1,38 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import User
+
+PASSWORD = 'password123'
+# A cheap hash keeps the tests fast; users created here match it, so logins do not rehash
+HASH_METHOD = 'pbkdf2:sha256:1000'
+
+TEST_CONFIG = {
+    'TESTING': True,
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'WTF_CSRF_ENABLED': False,
+    'IMAGE_WORKERS': 0,
+    'PASSWORD_HASH_METHOD': HASH_METHOD,
+}
+
+def make_app(**config):
+    return create_app({**TEST_CONFIG, **config})
+
+@pytest.fixture
+def app():
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def add_user(email, **fields):
+    """Create a user who can log in with PASSWORD; call inside an app context."""
+    user = User(email=email, username=email.split('@')[0], password=generate_password_hash(PASSWORD, method=HASH_METHOD),
+                **fields)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def login(client, email):
+    return client.post('/auth/login', data={'email': email, 'password': PASSWORD})
@@ -0,0 +1,60 @@
+import threading
+from app import db
+from app.models import Job, Application, ApplicationStatus
+from .conftest import make_app, add_user, login
+
+RACERS = 6
+JOBS = 10
+
+def test_racing_accepts_leave_one_accepted_worker(tmp_path):
+    """Clients accepting different applications to one job at the same moment: exactly one may win."""
+    # Every racer logs in as the poster, more often than the per-account login limit allows
+    app = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'race.db'}", RATELIMIT_ENABLED=False)
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        worker_ids = [add_user(f'worker{i}@example.com') for i in range(RACERS)]
+        applications = {}
+        for n in range(JOBS):
+            job = Job(title=f'Job {n}', description='Racing accepts for this job.', profession='Plumber',
+                      location='Rabat', budget=100, poster_id=poster_id)
+            db.session.add(job)
+            db.session.flush()
+            rows = [Application(job_id=job.id, worker_id=worker_id) for worker_id in worker_ids]
+            db.session.add_all(rows)
+            db.session.flush()
+            applications[job.id] = [row.id for row in rows]
+        db.session.commit()
+
+    barrier = threading.Barrier(RACERS)
+    won, errors = [0] * RACERS, []
+
+    def race(index):
+        client = app.test_client()
+        login(client, 'poster@example.com')
+        for job_id, application_ids in applications.items():
+            barrier.wait()
+            try:
+                response = client.post(f'/job/accept-application/{job_id}/{application_ids[index]}')
+            except Exception as e:
+                errors.append(e)
+                continue
+            if response.status_code != 302:
+                errors.append(response.status_code)
+            elif '/profile/' in response.location:
+                won[index] += 1
+            elif '/job/job_details/' not in response.location:
+                errors.append(response.location)
+
+    threads = [threading.Thread(target=race, args=(i,)) for i in range(RACERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sum(won) == JOBS
+    with app.app_context():
+        for job_id in applications:
+            statuses = sorted(status.value for status, in db.session.query(Application.status).filter_by(job_id=job_id))
+            assert statuses == sorted([ApplicationStatus.ACCEPTED.value] + [ApplicationStatus.REJECTED.value] * (RACERS - 1))
+            assert db.session.get(Job, job_id).status == ApplicationStatus.IN_PROGRESS
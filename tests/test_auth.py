@@ -0,0 +1,33 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User
+from .conftest import make_app, add_user, login, PASSWORD, HASH_METHOD
+
+def test_busy_rehash_is_retried_without_charging_the_rate_limit_again():
+    """A login that rehashes retries only its write when SQLite is busy."""
+    app = make_app(DB_BUSY_BACKOFF=0, RATELIMITS={'login:account': (1, 60)})
+    with app.app_context():
+        user_id = add_user('amina@example.com')
+        # Hashed with a cheaper method than configured, so logging in rehashes it
+        db.session.execute(db.update(User).where(User.id == user_id)
+                           .values(password=generate_password_hash(PASSWORD, method='pbkdf2:sha256:500')))
+        db.session.commit()
+        engine = db.engine
+
+    busy = []
+    def lock_first_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE user') and not busy:
+            busy.append(statement)
+            raise OperationalError(statement, parameters, sqlite3.OperationalError('database is locked'))
+    event.listen(engine, 'before_cursor_execute', lock_first_write)
+    try:
+        response = login(app.test_client(), 'amina@example.com')
+    finally:
+        event.remove(engine, 'before_cursor_execute', lock_first_write)
+
+    assert busy and response.status_code == 302
+    with app.app_context():
+        assert db.session.get(User, user_id).password.startswith(f'{HASH_METHOD}$')
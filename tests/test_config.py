@@ -0,0 +1,15 @@
+import pytest
+from flask import Flask
+from app.config import load_config
+
+def test_production_requires_a_secret_key(monkeypatch):
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    monkeypatch.setattr('app.config.ProductionConfig.SECRET_KEY', None)
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        load_config(Flask(__name__), 'production')
+
+def test_production_uses_the_secret_key_it_is_given(monkeypatch):
+    monkeypatch.setattr('app.config.ProductionConfig.SECRET_KEY', 'from the environment')
+    app = Flask(__name__)
+    load_config(app, 'production')
+    assert app.config['SECRET_KEY'] == 'from the environment'
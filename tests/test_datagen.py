@@ -0,0 +1,19 @@
+from app import db
+from app.datagen import generate
+from app.models import User, Job, Application
+from .conftest import add_user
+
+def test_generated_jobs_only_reference_existing_users(app):
+    """Deleted users leave gaps in the ids; generated posters and workers must skip them."""
+    with app.app_context():
+        kept_id = add_user('kept@example.com')
+        deleted_id = add_user('deleted@example.com')
+        add_user('last@example.com')
+        db.session.execute(db.delete(User).where(User.id == deleted_id))
+        db.session.commit()
+
+        generate(users=3, jobs=100, progress=lambda message: None)
+        user_ids = set(db.session.scalars(db.select(User.id)))
+        assert kept_id in user_ids and deleted_id not in user_ids
+        assert set(db.session.scalars(db.select(Job.poster_id))) <= user_ids
+        assert set(db.session.scalars(db.select(Application.worker_id))) <= user_ids
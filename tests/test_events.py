@@ -0,0 +1,36 @@
+from .conftest import add_user, login
+
+def test_only_pages_that_show_notifications_open_a_stream(app, client):
+    """Each open stream holds a server worker, so most pages must not start one."""
+    with app.app_context():
+        user_id = add_user('amina@example.com')
+        other_id = add_user('nora@example.com')
+    login(client, 'amina@example.com')
+
+    for page in ('/messages/', f'/messages/{other_id}', f'/profile/profile/{user_id}'):
+        assert 'id="live-notifications"' in client.get(page).get_data(as_text=True), page
+    for page in ('/job/jobs', f'/profile/profile/{other_id}', '/profile/update-profile'):
+        assert 'id="live-notifications"' not in client.get(page).get_data(as_text=True), page
+
+def read_stream(client, **headers):
+    """The chunks of one stream, read until it ends."""
+    response = client.get('/events/stream', headers=headers, buffered=False)
+    return [chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in response.response]
+
+def test_reconnecting_stream_gets_the_events_it_missed(app, client):
+    app.config.update(EVENTS_STREAM_SECONDS=0.2, EVENTS_HEARTBEAT=0.05)
+    with app.app_context():
+        user_id = add_user('amina@example.com')
+    login(client, 'amina@example.com')
+    bus = app.extensions['events']
+
+    bus.publish(user_id, 'message', {'sender_id': 2, 'sender': 'Nora'})
+    # A fresh page load does not replay what the page already shows
+    assert not [chunk for chunk in read_stream(client) if chunk.startswith('id:')]
+
+    # Published while the browser waited to reconnect
+    bus.publish(user_id, 'decision', {'job_id': 1, 'title': 'Sink', 'status': 'accepted'})
+    bus.publish(user_id, 'job_finished', {'job_id': 1, 'title': 'Sink'})
+    events = [chunk for chunk in read_stream(client, **{'Last-Event-ID': '1'}) if chunk.startswith('id:')]
+    assert [event.split('\n')[:2] for event in events] == [['id: 2', 'event: decision'],
+                                                           ['id: 3', 'event: job_finished']]
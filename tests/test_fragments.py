@@ -0,0 +1,49 @@
+from app import db
+from app.models import Job, Application
+from app.fragments import fragment_key
+from .conftest import add_user, login
+
+def test_job_fragments_are_dropped_on_every_change(app):
+    """Each write that changes what a job's pages show drops its cached fragments."""
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        worker_ids = [add_user(f'worker{i}@example.com') for i in range(3)]
+        job = Job(title='Fix the sink', description='Fix the sink, tools provided.', profession='Plumber',
+                  location='Rabat', budget=100, poster_id=poster_id)
+        db.session.add(job)
+        db.session.flush()
+        applications = [Application(job_id=job.id, worker_id=worker_id) for worker_id in worker_ids[:2]]
+        db.session.add_all(applications)
+        db.session.commit()
+        job_id, (accepted_id, rejected_id) = job.id, [application.id for application in applications]
+    cache = app.extensions['fragment_cache']
+    poster, worker = app.test_client(), app.test_client()
+    login(poster, 'poster@example.com')
+    login(worker, 'worker2@example.com')
+
+    for client, url in [(worker, f'/job/apply-job/{job_id}'),
+                        (poster, f'/job/reject-application/{job_id}/{rejected_id}'),
+                        (poster, f'/job/accept-application/{job_id}/{accepted_id}'),
+                        (poster, f'/job/finish-job/{job_id}')]:
+        poster.get(f'/job/job_details/{job_id}')
+        assert cache.get(fragment_key('details', job_id)) is not None
+        assert client.post(url).status_code == 302
+        assert cache.get(fragment_key('details', job_id)) is None, url
+
+def test_job_details_show_the_posters_new_name(app, client):
+    """The details fragment shows the poster's name, so renaming them drops the fragments of their jobs."""
+    with app.app_context():
+        poster_id = add_user('poster@example.com', first_name='Amina', last_name='Idrissi')
+        job = Job(title='Fix the sink', description='Fix the sink, tools provided.', profession='Plumber',
+                  location='Rabat', budget=100, poster_id=poster_id)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+    login(client, 'poster@example.com')
+    assert 'Amina Idrissi' in client.get(f'/job/job_details/{job_id}').get_data(as_text=True)
+
+    assert client.post('/profile/update-profile', data={
+        'first_name': 'Amina', 'last_name': 'Tazi', 'email': 'poster@example.com', 'location': 'Rabat',
+        'profession': 'Plumber', 'date_of_birth': '1990-01-01', 'about_me': ''}).status_code == 302
+    page = client.get(f'/job/job_details/{job_id}').get_data(as_text=True)
+    assert 'Amina Tazi' in page and 'Idrissi' not in page
@@ -0,0 +1,30 @@
+from app import db
+from app.models import User
+from .conftest import add_user, login
+
+PROFILE = {'first_name': 'Amina', 'last_name': 'Idrissi', 'email': 'amina@example.com', 'location': 'Rabat',
+           'profession': 'Plumber', 'date_of_birth': '1990-01-01', 'about_me': ''}
+
+def test_profile_update_is_saved_over_a_stale_cached_identity(app, client):
+    """A change made elsewhere leaves the cached identity stale; the profile form must still be saved as submitted."""
+    with app.app_context():
+        user_id = add_user('amina@example.com', first_name='Amina', last_name='Idrissi')
+    login(client, 'amina@example.com')
+    with app.app_context():
+        # Another process renames the user; this one keeps serving the cached 'Amina' until the TTL runs out
+        db.session.execute(db.update(User).where(User.id == user_id).values(first_name='Nora'))
+        db.session.commit()
+
+    assert client.post('/profile/update-profile', data=PROFILE).status_code == 302
+    with app.app_context():
+        assert db.session.get(User, user_id).first_name == 'Amina'
+
+def test_profile_form_shows_the_stored_profile(app, client):
+    with app.app_context():
+        user_id = add_user('amina@example.com', first_name='Amina', last_name='Idrissi')
+    login(client, 'amina@example.com')
+    with app.app_context():
+        db.session.execute(db.update(User).where(User.id == user_id).values(first_name='Nora'))
+        db.session.commit()
+
+    assert 'value="Nora"' in client.get('/profile/update-profile').get_data(as_text=True)
@@ -0,0 +1,52 @@
+import sqlite3
+from PIL import Image
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import Job, JobPicture, PictureStatus
+from .conftest import make_app, add_user
+
+def setup_picture(app, tmp_path):
+    """A PROCESSING picture of a new job, and the path of its source image."""
+    source = tmp_path / 'source.png'
+    Image.new('RGB', (40, 30), 'red').save(source)
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        job = Job(title='Fix the sink', description='Fix the sink, tools provided.', profession='Plumber',
+                  location='Rabat', budget=100, poster_id=poster_id)
+        db.session.add(job)
+        db.session.flush()
+        picture = JobPicture(filename='source.png', job_id=job.id, status=PictureStatus.PROCESSING)
+        db.session.add(picture)
+        db.session.commit()
+        return picture.id, str(source)
+
+def fail_status_writes(app, times, error):
+    """Make the next `times` picture status updates raise error."""
+    failures = []
+    def fail(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE job_picture') and len(failures) < times:
+            failures.append(statement)
+            raise OperationalError(statement, parameters, error)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', fail)
+    return failures
+
+def status_of(app, picture_id):
+    with app.app_context():
+        return db.session.get(JobPicture, picture_id).status
+
+def test_busy_status_write_is_retried(tmp_path):
+    app = make_app(DB_BUSY_BACKOFF=0)
+    picture_id, source = setup_picture(app, tmp_path)
+    failures = fail_status_writes(app, 1, sqlite3.OperationalError('database is locked'))
+    app.extensions['images'].process(picture_id, source)
+    assert failures and status_of(app, picture_id) == PictureStatus.READY
+
+def test_failed_status_write_marks_the_picture_failed(tmp_path):
+    """A picture whose outcome cannot be recorded must not stay PROCESSING forever."""
+    app = make_app()
+    picture_id, source = setup_picture(app, tmp_path)
+    failures = fail_status_writes(app, 1, sqlite3.OperationalError('disk I/O error'))
+    app.extensions['images'].process(picture_id, source)
+    assert failures and status_of(app, picture_id) == PictureStatus.FAILED
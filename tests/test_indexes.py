@@ -0,0 +1,91 @@
+from sqlalchemy import event
+from app import db
+from app.datagen import generate
+from app.models import Job, Message, SavedSearch, FeedItem
+from .conftest import add_user, login
+
+# Pages whose reads must all be served by an index, visited as the logged-in user
+PAGES = [
+    '/job/jobs',
+    '/job/jobs?location=Rabat',
+    '/job/jobs?profession=Plumber',
+    '/job/jobs?location=Rabat&profession=Plumber',
+    '/job/jobs?skills=pipes,drains',
+    '/job/jobs?keywords=sink',
+    '/job/feed',
+    '/job/job_details/{job_id}',
+    '/profile/profile/{user_id}',
+    '/profile/profile/{other_id}',
+    '/worker/search?location=Rabat&profession=Plumber',
+    '/worker/search?location=Rabat&profession=Plumber&sort=reviews',
+    '/worker/search?location=Rabat&profession=Plumber&sort=recent',
+    '/worker/search?location=Rabat&profession=Plumber&skills=pipes,drains',
+    '/messages/',
+    '/messages/{other_id}',
+]
+
+# Writes whose lookups must be indexed too, as (url, form data)
+POSTS = [
+    ('/job/post', {'title': 'Fix the roof', 'description': 'The roof leaks when it rains.', 'profession': 'Plumber',
+                   'location': 'Rabat', 'budget': '300', 'expected_duration': '1 day', 'required_skills': 'pipes, roofing'}),
+    ('/job/apply-job/{job_id}', {}),
+    ('/messages/{other_id}', {'content': 'Are you free on Monday?'}),
+]
+
+def reads(statement):
+    """Whether a statement looks rows up: any SELECT, UPDATE or DELETE, or an INSERT ... SELECT."""
+    verb = statement.split(None, 1)[0].upper()
+    return verb in ('SELECT', 'UPDATE', 'DELETE') or (verb == 'INSERT' and 'SELECT' in statement.upper())
+
+def is_table_scan(step):
+    """Whether a plan step reads a whole table; scans of subquery results do not count."""
+    words = step.split()
+    return words[:1] == ['SCAN'] and 'INDEX' not in step and words[1] in db.metadata.tables
+
+def seed():
+    generate(users=50, jobs=200, progress=lambda message: None)
+    user_id = add_user('reader@example.com', location='Rabat', profession='Plumber')
+    job = Job.query.filter(Job.is_open(), Job.poster_id != user_id).first()
+    other_id = job.poster_id
+    db.session.add_all([Message(sender_id=user_id, receiver_id=other_id, content='Hello'),
+                        Message(sender_id=other_id, receiver_id=user_id, content='Hi')])
+    db.session.add(SavedSearch(user_id=user_id, location='Rabat', profession='All'))
+    db.session.add(FeedItem(user_id=user_id, job_id=job.id))
+    db.session.commit()
+    return {'user_id': user_id, 'other_id': other_id, 'job_id': job.id}
+
+def test_route_queries_use_indexes(app, client):
+    """Run the routes and EXPLAIN every lookup they issue, so the check follows the views as they change."""
+    with app.app_context():
+        ids = seed()
+        # The recommendation indexes load every row on purpose, once per process
+        app.extensions['recommender'].refresh()
+        engine = db.engine
+    login(client, 'reader@example.com')
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if reads(statement):
+            statements.append((statement, parameters))
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for page in PAGES:
+            statements.append((page, None))
+            assert client.get(page.format(**ids)).status_code == 200, page
+        for url, data in POSTS:
+            statements.append((url, None))
+            assert client.post(url.format(**ids), data=data).status_code == 302, url
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    full_scans = []
+    with engine.connect() as connection:
+        page = None
+        for statement, parameters in statements:
+            if parameters is None:
+                page = statement
+                continue
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            if any(is_table_scan(step) for step in plan):
+                full_scans.append(f"{page}: {' '.join(statement.split())}\n    {'; '.join(plan)}")
+    assert not full_scans, 'Full table scans:\n' + '\n'.join(full_scans)
@@ -0,0 +1,37 @@
+import re
+from datetime import datetime
+from app import db
+from app.models import Job
+from .conftest import add_user
+
+def add_jobs(count, **fields):
+    poster_id = add_user('poster@example.com')
+    for n in range(count):
+        db.session.add(Job(title=f'Job {n}', description='A job to page through.', profession='Plumber',
+                           location='Rabat', poster_id=poster_id, **fields))
+    db.session.commit()
+    return {job_id for job_id, in db.session.query(Job.id)}
+
+def page_through(client, per_page):
+    """Follow the 'Older jobs' links from the first page; return the job ids in the order shown."""
+    url, seen = f'/job/jobs?per_page={per_page}', []
+    for _ in range(50):
+        html = client.get(url).get_data(as_text=True)
+        seen += [int(job_id) for job_id in re.findall(r"openJobModal\('(\d+)'\)", html)]
+        next_link = re.search(r'href="([^"]*after=[^"]*)"', html)
+        if not next_link:
+            return seen
+        url = next_link.group(1).replace('&amp;', '&')
+    raise AssertionError('the next link never ran out')
+
+def test_jobs_posted_in_the_same_second_page_once_each(app, client):
+    with app.app_context():
+        job_ids = add_jobs(7, date_posted=datetime(2026, 1, 1, 12, 0, 0))
+    seen = page_through(client, per_page=2)
+    assert sorted(seen) == sorted(job_ids)
+
+def test_jobs_posted_together_by_default_page_once_each(app, client):
+    with app.app_context():
+        job_ids = add_jobs(7)
+    seen = page_through(client, per_page=2)
+    assert sorted(seen) == sorted(job_ids)
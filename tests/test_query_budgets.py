@@ -0,0 +1,173 @@
+import re
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Skill, Job, JobPicture, Application, Review
+from .conftest import make_app, PASSWORD, HASH_METHOD
+
+# Maximum SQL statements per request, by scenario step
+QUERY_BUDGETS = {
+    'home.index': 0,
+    'auth.login (form)': 0,
+    'auth.login': 1,
+    'auth.sign_up (form)': 0,
+    'auth.sign_up': 4,
+    'auth.logout': 1,
+    'job.view_jobs (anonymous)': 1,
+    'job.view_jobs': 2,
+    'job.view_jobs (filtered)': 1,
+    'job.view_jobs (keywords)': 1,
+    'job.post_job (form)': 0,
+    'job.post_job': 4,
+    'job.job_details': 4,
+    'job.apply_job': 3,
+    'job.reject_application': 3,
+    'job.accept_application': 6,
+    'job.finish_job': 3,
+    'job.rate_job (form)': 3,
+    'job.rate_job': 3,
+    'job.delete_job': 11,
+    'profile.view_profile (own)': 8,
+    'profile.view_profile (other)': 5,
+    'profile.update_profile (form)': 1,
+    'profile.update_profile': 2,
+    'profile.add_skill': 5,
+    'profile.add_experience': 2,
+    'job.save_search': 2,
+    'job.feed': 2,
+    'job.delete_saved_search': 2,
+    'worker.search_workers (form)': 0,
+    'worker.search_workers': 1,
+    'messages.send_message': 2,
+    'messages.inbox': 3,
+    'messages.view_thread': 4,
+}
+
+# Applications per job in the small and large datasets; counts must not change between them
+SCALES = (2, 200)
+
+def seed(applications_per_job):
+    """Create a poster with three jobs, each applied to by applications_per_job workers."""
+    password = generate_password_hash(PASSWORD, method=HASH_METHOD)
+    poster = User(email='poster@example.com', username='poster', password=password,
+                  first_name='Poster', last_name='User', location='Rabat', profession='Plumber')
+    newcomer = User(email='newcomer@example.com', username='newcomer', password=password,
+                    location='Rabat', profession='Plumber')
+    db.session.add_all([poster, newcomer])
+    db.session.flush()
+
+    jobs = []
+    for title in ('Fix the kitchen sink', 'Repaint the hallway', 'Rewire the garage'):
+        job = Job(title=title, description=f'{title}, tools provided.', profession='Plumber',
+                  location='Rabat', budget=500, expected_duration='2 days',
+                  required_skills='pipes, wiring', poster_id=poster.id)
+        db.session.add(job)
+        jobs.append(job)
+    db.session.flush()
+
+    for i in range(applications_per_job):
+        worker = User(email=f'worker{i}@example.com', username=f'worker{i}', password=password,
+                      first_name='Worker', last_name=str(i), location='Rabat', profession='Plumber')
+        db.session.add(worker)
+        db.session.flush()
+        db.session.add(Skill(name='pipes', user_id=worker.id))
+        for job in jobs:
+            db.session.add(Application(job_id=job.id, worker_id=worker.id))
+        db.session.add(Review(job_id=jobs[0].id, reviewer_id=worker.id, reviewee_id=poster.id, rating=4))
+        db.session.add(JobPicture(filename=f'{i}.jpg', job_id=jobs[i % 3].id))
+    db.session.commit()
+    return poster.id, newcomer.id, [job.id for job in jobs]
+
+def queries_in(response):
+    """Read the statement count from the Server-Timing header set by instrumentation."""
+    match = re.search(r'desc="(\d+) queries"', response.headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+def measure(applications_per_job):
+    """Run every route once against a fresh dataset and return {step: statement count}."""
+    app = make_app(REQUEST_TIMING=True)
+    with app.app_context():
+        poster_id, newcomer_id, (kept_id, deleted_id, rated_id) = seed(applications_per_job)
+        applications = {job_id: [a.id for a in Application.query.filter_by(job_id=job_id).order_by(Application.id)]
+                        for job_id in (kept_id, rated_id)}
+        worker_id = Application.query.get(applications[kept_id][0]).worker_id
+        # Recommendation indexes are loaded once per process, not per request
+        app.extensions['recommender'].refresh()
+
+    client = app.test_client()
+    counts = {}
+
+    def step(name, method, url, **kwargs):
+        response = client.open(url, method=method, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name}: {method} {url} returned {response.status_code}')
+        counts[name] = queries_in(response)
+
+    def login(email):
+        step('auth.login', 'POST', '/auth/login', data={'email': email, 'password': PASSWORD})
+
+    # Anonymous pages
+    step('home.index', 'GET', '/')
+    step('auth.login (form)', 'GET', '/auth/login')
+    step('auth.sign_up (form)', 'GET', '/auth/sign-up')
+    step('job.view_jobs (anonymous)', 'GET', '/job/jobs')
+    step('auth.sign_up', 'POST', '/auth/sign-up', data={
+        'email': 'new@example.com', 'username': 'new', 'password1': PASSWORD, 'password2': PASSWORD})
+    step('auth.logout', 'GET', '/auth/logout')
+
+    # A worker saves a search, matched by the job posted below
+    login('newcomer@example.com')
+    step('job.save_search', 'POST', '/job/saved-searches', data={'location': 'Rabat', 'profession': 'All'})
+    client.get('/auth/logout')
+
+    # The poster manages their jobs
+    login('poster@example.com')
+    step('job.view_jobs', 'GET', '/job/jobs')
+    step('job.view_jobs (filtered)', 'GET', '/job/jobs?location=Rabat&profession=Plumber')
+    step('job.view_jobs (keywords)', 'GET', '/job/jobs?keywords=sink')
+    step('job.job_details', 'GET', f'/job/job_details/{kept_id}')
+    step('profile.view_profile (own)', 'GET', f'/profile/profile/{poster_id}')
+    step('profile.view_profile (other)', 'GET', f'/profile/profile/{worker_id}')
+    step('profile.update_profile (form)', 'GET', '/profile/update-profile')
+    step('profile.update_profile', 'POST', '/profile/update-profile', data={
+        'first_name': 'Poster', 'last_name': 'User', 'email': 'poster@example.com',
+        'location': 'Rabat', 'profession': 'Plumber', 'date_of_birth': '1990-01-01', 'about_me': 'Hi'})
+    step('profile.add_skill', 'POST', '/profile/add-skill', data={'skill': 'tiling'})
+    step('profile.add_experience', 'POST', '/profile/add-experience', data={
+        'experience': 'Plumber', 'company': 'Acme', 'start_date': '2020-01-01', 'end_date': '2021-01-01'})
+    step('worker.search_workers (form)', 'GET', '/worker/search')
+    step('worker.search_workers', 'POST', '/worker/search', data={'location': 'Rabat', 'profession': 'Plumber'})
+    step('job.post_job (form)', 'GET', '/job/post')
+    step('job.post_job', 'POST', '/job/post', data={
+        'title': 'Fix the roof', 'description': 'The roof leaks when it rains.', 'profession': 'Plumber',
+        'location': 'Rabat', 'budget': '300', 'expected_duration': '1 day', 'required_skills': 'roofing'})
+    step('job.reject_application', 'POST', f'/job/reject-application/{kept_id}/{applications[kept_id][1]}')
+    step('job.accept_application', 'POST', f'/job/accept-application/{rated_id}/{applications[rated_id][0]}')
+    step('job.finish_job', 'POST', f'/job/finish-job/{rated_id}')
+    step('job.rate_job (form)', 'GET', f'/job/rate-job/{rated_id}')
+    step('job.rate_job', 'POST', f'/job/rate-job/{rated_id}', data={'rating': '5', 'comment': 'Great work'})
+    step('job.delete_job', 'POST', f'/job/delete-job/{deleted_id}')
+    step('messages.send_message', 'POST', f'/messages/{newcomer_id}', data={'content': 'Are you free on Monday?'})
+    client.get('/auth/logout')
+
+    # A worker reads their messages and applies
+    login('newcomer@example.com')
+    step('messages.inbox', 'GET', '/messages/')
+    step('messages.view_thread', 'GET', f'/messages/{poster_id}')
+    step('job.feed', 'GET', '/job/feed')
+    step('job.apply_job', 'POST', f'/job/apply-job/{kept_id}')
+    step('job.delete_saved_search', 'POST', '/job/saved-searches/1/delete')
+    return counts
+
+@pytest.fixture(scope='module')
+def measured():
+    """Statement counts of every step, at each scale."""
+    return [measure(scale) for scale in SCALES]
+
+@pytest.mark.parametrize('name', QUERY_BUDGETS)
+def test_query_budget(measured, name):
+    """A route stays within its statement budget and issues as many statements whatever the data size; growth is an N+1."""
+    counts = [result.get(name) for result in measured]
+    assert None not in counts, f'{name} was not measured'
+    assert max(counts) <= QUERY_BUDGETS[name], f'{name} issued {counts} statements, over its budget of {QUERY_BUDGETS[name]}'
+    assert len(set(counts)) == 1, f'{name} issued {counts} statements as data grew'
@@ -0,0 +1,65 @@
+import threading
+from app import db
+from app.models import Job, ApplicationStatus
+from app.recommend import MatchIndex, recommend_jobs, job_changed
+from .conftest import make_app, add_user
+
+def add_job(poster_id, title, status=ApplicationStatus.OPEN):
+    job = Job(title=title, description=f'{title}, tools provided.', profession='Plumber', location='Rabat',
+              budget=100, poster_id=poster_id, status=status)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+def set_status(job_id, status):
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(status=status))
+    db.session.commit()
+
+def test_changes_below_the_last_id_are_applied_in_place(app):
+    """Deleted and reopened jobs are updated without reloading the whole index on the request thread."""
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        worker_id = add_user('worker@example.com', profession='Plumber', location='Rabat')
+        closed_id = add_job(poster_id, 'Fix the sink', ApplicationStatus.COMPLETED)
+        deleted_id = add_job(poster_id, 'Fix the bath', ApplicationStatus.COMPLETED)
+        open_id = add_job(poster_id, 'Fix the roof')
+        assert recommend_jobs(worker_id) == [open_id]
+
+        jobs = app.extensions['recommender'].jobs
+        fetched = []
+        fetch = jobs.fetch
+        jobs.fetch = lambda ids=None: fetched.append(ids) or fetch(ids)
+        db.session.execute(db.delete(Job).where(Job.id == deleted_id))
+        set_status(closed_id, ApplicationStatus.OPEN)
+        job_changed(deleted_id, closed_id)
+
+        assert recommend_jobs(worker_id) == [open_id, closed_id]
+        assert fetched == [[closed_id, deleted_id]]
+        assert jobs.ids.tolist() == sorted(jobs.ids.tolist())
+
+def test_reload_after_max_age_runs_in_the_background(monkeypatch):
+    """Requests keep using the old index while the full reload runs, then see the new one."""
+    app = make_app(RECOMMENDATIONS_MAX_AGE=0)
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        worker_id = add_user('worker@example.com', profession='Plumber', location='Rabat')
+        first_id = add_job(poster_id, 'Fix the sink')
+        assert recommend_jobs(worker_id) == [first_id]
+
+        # Posted by another process, so only a full reload sees it
+        second_id = add_job(poster_id, 'Fix the roof')
+        release = threading.Event()
+        fetch = MatchIndex.fetch
+        def slow_fetch(index, ids=None):
+            if ids is None:
+                release.wait()
+            return fetch(index, ids)
+        monkeypatch.setattr(MatchIndex, 'fetch', slow_fetch)
+
+        assert recommend_jobs(worker_id) == [first_id]
+        release.set()
+        for thread in threading.enumerate():
+            if thread.name == 'recommender-reload':
+                thread.join()
+        monkeypatch.undo()
+        assert recommend_jobs(worker_id) == [second_id, first_id]
@@ -0,0 +1,22 @@
+from app import db
+from app.models import Job, SavedSearch, FeedItem
+from app.saved_searches import match_job
+from .conftest import add_user
+
+def test_keywords_match_literally(app):
+    """% and _ in saved keywords are plain characters, not LIKE wildcards."""
+    with app.app_context():
+        poster_id = add_user('poster@example.com')
+        searches = {keywords: add_user(f'{name}@example.com')
+                    for name, keywords in [('percent', '%'), ('underscore', 'f_x'), ('phrase', 'the sink')]}
+        db.session.add_all([SavedSearch(user_id=user_id, location='All', profession='All', keywords=keywords)
+                            for keywords, user_id in searches.items()])
+        job = Job(title='Fix the sink', description='Tools provided, paid on the day.',
+                  profession='Plumber', location='Rabat', budget=100, poster_id=poster_id)
+        db.session.add(job)
+        db.session.flush()
+        match_job(job)
+        db.session.commit()
+
+        fed = set(db.session.scalars(db.select(FeedItem.user_id)))
+        assert fed == {searches['the sink']}
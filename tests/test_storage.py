@@ -0,0 +1,23 @@
+import os
+from app import db
+from app.models import StoredFile
+from app.storage import store, release, prune, file_path
+from .conftest import make_app
+
+def test_prune_removes_only_unreferenced_files(tmp_path):
+    app = make_app(MEDIA_FOLDER=str(tmp_path))
+    with app.test_request_context():
+        kept = store(b'kept', '.jpg')
+        dropped = store(b'dropped', '.jpg')
+        reused = store(b'reused', '.jpg')
+        db.session.commit()
+        release(dropped)
+        # Released, then stored again by another upload before the prune
+        release(reused)
+        assert store(b'reused', '.jpg') == reused
+        db.session.commit()
+
+        assert prune() == 1
+        assert not os.path.exists(file_path(dropped))
+        assert os.path.exists(file_path(kept)) and os.path.exists(file_path(reused))
+        assert sorted(name for name, in db.session.query(StoredFile.name)) == sorted([kept, reused])
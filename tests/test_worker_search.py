@@ -0,0 +1,14 @@
+from .conftest import make_app, add_user, PASSWORD
+
+def test_search_form_keeps_the_csrf_token_out_of_urls():
+    """The search form is sent with GET, so it must not carry a CSRF token into the URL."""
+    app = make_app(WTF_CSRF_ENABLED=True)
+    with app.app_context():
+        add_user('amina@example.com')
+    client = app.test_client()
+    page = client.get('/auth/login').get_data(as_text=True)
+    token = page.split('name="csrf_token" type="hidden" value="', 1)[1].split('"', 1)[0]
+    client.post('/auth/login', data={'email': 'amina@example.com', 'password': PASSWORD, 'csrf_token': token})
+
+    page = client.get('/worker/search?location=Rabat&profession=Plumber').get_data(as_text=True)
+    assert 'id="search-form"' in page and 'csrf_token' not in page